@@ -1,8 +1,13 @@
 # admin/routes.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from models import User, ContactMessage, ChatbotConversation, ChatbotMessage, PageView, VisitorSession, db
-from datetime import datetime, timezone
+from models import User, ContactMessage, ChatbotConversation, ChatbotMessage, PageView, db
+from datetime import datetime, time, timedelta, timezone
+import rollups
+import stats
+from pagination import keyset_paginate
+from transcripts import expand_transcript
+from exports import EXPORT_FORMATS, export_response, stream_batches
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -16,77 +21,77 @@ def admin_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+# Statements behind the admin pages; `flask check-query-plans` explains the same ones
+def recent_statement(model, limit):
+    return db.select(model).order_by(model.created_at.desc()).limit(limit)
+
+def status_statement(model, status):
+    statement = db.select(model)
+    if status != 'all':
+        statement = statement.where(model.status == status)
+    return statement
+
+def conversation_messages_statement(conversation_id):
+    return db.select(ChatbotMessage).where(ChatbotMessage.conversation_id == conversation_id) \
+        .order_by(ChatbotMessage.created_at)
+
+def export_statement(table, conditions):
+    return db.select(table).where(*conditions).order_by(table.c.created_at, table.c.id)
+
 @admin_bp.route('/dashboard')
 @login_required
 @admin_required
 def dashboard():
     """Admin dashboard with overview stats"""
-    # Get statistics
-    total_contacts = ContactMessage.query.count()
-    unread_contacts = ContactMessage.query.filter_by(is_read=False).count()
-    total_chatbot_conversations = ChatbotConversation.query.count()
-    active_chatbot_conversations = ChatbotConversation.query.filter_by(status='active').count()
-    total_page_views = PageView.query.count()
-    total_sessions = VisitorSession.query.count()
-    
-    # Get message counts for template
-    total_messages = ContactMessage.query.count()
-    new_messages = ContactMessage.query.filter_by(status='new').count()
-    pending_messages = ContactMessage.query.filter_by(status='pending').count()
-    responded_messages = ContactMessage.query.filter_by(status='responded').count()
-    closed_messages = ContactMessage.query.filter_by(status='closed').count()
+    # Get statistics (cached, one grouped query per table)
+    contacts = stats.contact_stats()
+    conversations = stats.chatbot_stats()
+    traffic = stats.traffic_stats()
     
     # Get recent activities
-    recent_contacts = ContactMessage.query.order_by(ContactMessage.created_at.desc()).limit(5).all()
-    recent_chatbot = ChatbotConversation.query.order_by(ChatbotConversation.created_at.desc()).limit(5).all()
+    recent_contacts = db.session.scalars(recent_statement(ContactMessage, 5)).all()
+    recent_chatbot = db.session.scalars(recent_statement(ChatbotConversation, 5)).all()
     
     return render_template('admin/dashboard.html', 
-                         total_contacts=total_contacts,
-                         unread_contacts=unread_contacts,
-                         total_chatbot_conversations=total_chatbot_conversations,
-                         active_chatbot_conversations=active_chatbot_conversations,
-                         total_page_views=total_page_views,
-                         total_sessions=total_sessions,
+                         total_contacts=contacts['total'],
+                         unread_contacts=contacts['unread'],
+                         total_chatbot_conversations=conversations['total'],
+                         active_chatbot_conversations=conversations['active'],
+                         total_page_views=traffic['page_views'],
+                         total_sessions=traffic['sessions'],
                          recent_contacts=recent_contacts,
                          recent_chatbot=recent_chatbot,
-                         total_messages=total_messages,
-                         new_messages=new_messages,
-                         pending_messages=pending_messages,
-                         responded_messages=responded_messages,
-                         closed_messages=closed_messages)
+                         total_messages=contacts['total'],
+                         new_messages=contacts['new'],
+                         pending_messages=contacts['pending'],
+                         responded_messages=contacts['responded'],
+                         closed_messages=contacts['closed'])
 
 @admin_bp.route('/messages')
 @login_required
 @admin_required
 def messages():
     """Manage contact messages"""
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', 'all')
     
-    query = ContactMessage.query
-    
     # Get counts for template
-    total_messages = ContactMessage.query.count()
-    new_messages = ContactMessage.query.filter_by(status='new').count()
-    pending_messages = ContactMessage.query.filter_by(status='pending').count()
-    responded_messages = ContactMessage.query.filter_by(status='responded').count()
-    closed_messages = ContactMessage.query.filter_by(status='closed').count()
+    counts = stats.contact_stats()
     
-    if status != 'all':
-        query = query.filter_by(status=status)
-    
-    messages = query.order_by(ContactMessage.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
+    # Keyset pagination; the total comes from the cached counts
+    messages = keyset_paginate(
+        status_statement(ContactMessage, status), ContactMessage,
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=20, total=counts['total'] if status == 'all' else counts.get(status, 0)
     )
     
     return render_template('admin/messages.html', 
                          messages=messages, 
                          status=status,
-                         total_messages=total_messages,
-                         new_messages=new_messages,
-                         pending_messages=pending_messages,
-                         responded_messages=responded_messages,
-                         closed_messages=closed_messages)
+                         total_messages=counts['total'],
+                         new_messages=counts['new'],
+                         pending_messages=counts['pending'],
+                         responded_messages=counts['responded'],
+                         closed_messages=counts['closed'])
 
 @admin_bp.route('/messages/<int:message_id>')
 @login_required
@@ -100,6 +105,7 @@ def view_message(message_id):
         message.is_read = True
         message.read_at = datetime.now(timezone.utc)
         db.session.commit()
+        stats.invalidate_contact_stats()
     
     return render_template('admin/view_message.html', message=message)
 
@@ -111,6 +117,7 @@ def delete_message(message_id):
     message = ContactMessage.query.get_or_404(message_id)
     db.session.delete(message)
     db.session.commit()
+    stats.invalidate_contact_stats()
     
     flash('Message deleted successfully.', 'success')
     return redirect(url_for('admin.messages'))
@@ -128,6 +135,7 @@ def toggle_message_status(message_id):
     message.status = status_cycle[next_index]
     
     db.session.commit()
+    stats.invalidate_contact_stats()
     
     return jsonify({'status': message.status})
 
@@ -136,31 +144,25 @@ def toggle_message_status(message_id):
 @admin_required
 def chatbot():
     """Manage chatbot conversations"""
-    page = request.args.get('page', 1, type=int)
     status = request.args.get('status', 'all')
     
-    query = ChatbotConversation.query
-    
-    if status != 'all':
-        query = query.filter_by(status=status)
-    
     # Get counts for template
-    total_conversations = ChatbotConversation.query.count()
-    active_conversations = ChatbotConversation.query.filter_by(status='active').count()
-    completed_conversations = ChatbotConversation.query.filter_by(status='completed').count()
-    follow_up_conversations = ChatbotConversation.query.filter_by(status='follow_up').count()
+    counts = stats.chatbot_stats()
     
-    conversations = query.order_by(ChatbotConversation.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
+    # Keyset pagination; the total comes from the cached counts
+    conversations = keyset_paginate(
+        status_statement(ChatbotConversation, status), ChatbotConversation,
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=20, total=counts['total'] if status == 'all' else counts.get(status, 0)
     )
     
     return render_template('admin/chatbot.html', 
                          conversations=conversations, 
                          status=status,
-                         total_conversations=total_conversations,
-                         active_conversations=active_conversations,
-                         completed_conversations=completed_conversations,
-                         follow_up_conversations=follow_up_conversations)
+                         total_conversations=counts['total'],
+                         active_conversations=counts['active'],
+                         completed_conversations=counts['completed'],
+                         follow_up_conversations=counts['follow_up'])
 
 @admin_bp.route('/chatbot/<int:conversation_id>')
 @login_required
@@ -168,7 +170,10 @@ def chatbot():
 def view_conversation(conversation_id):
     """View individual chatbot conversation"""
     conversation = ChatbotConversation.query.get_or_404(conversation_id)
-    messages = ChatbotMessage.query.filter_by(conversation_id=conversation_id).order_by(ChatbotMessage.created_at).all()
+    if conversation.transcript:
+        messages = expand_transcript(conversation)
+    else:
+        messages = db.session.scalars(conversation_messages_statement(conversation_id)).all()
     
     return render_template('admin/view_conversation.html', conversation=conversation, messages=messages)
 
@@ -180,6 +185,7 @@ def delete_conversation(conversation_id):
     conversation = ChatbotConversation.query.get_or_404(conversation_id)
     db.session.delete(conversation)
     db.session.commit()
+    stats.invalidate_chatbot_stats()
     
     flash('Conversation deleted successfully.', 'success')
     return redirect(url_for('admin.chatbot'))
@@ -189,18 +195,15 @@ def delete_conversation(conversation_id):
 @admin_required
 def analytics():
     """Website analytics"""
-    # Get page view statistics
-    total_page_views = PageView.query.count()
-    unique_sessions = VisitorSession.query.count()
+    # Get page view statistics from the rollup tables
+    total_page_views = rollups.total_page_views()
+    unique_sessions = rollups.total_sessions()
     
     # Get recent page views
-    recent_views = PageView.query.order_by(PageView.created_at.desc()).limit(100).all()
+    recent_views = db.session.scalars(recent_statement(PageView, 100)).all()
     
     # Get top pages
-    top_pages = db.session.query(
-        PageView.page_url, 
-        db.func.count(PageView.id).label('views')
-    ).group_by(PageView.page_url).order_by(db.func.count(PageView.id).desc()).limit(10).all()
+    top_pages = rollups.top_pages(10)
     
     return render_template('admin/analytics.html', 
                          total_page_views=total_page_views,
@@ -208,6 +211,111 @@ def analytics():
                          recent_views=recent_views,
                          top_pages=top_pages)
 
+def _export_filters(model, column):
+    """Parse ``format``, ``from`` and ``to`` (YYYY-MM-DD, inclusive) from the query string.
+
+    Returns ``(fmt, conditions)``, or None if the request is invalid.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return None
+    conditions = []
+    try:
+        if request.args.get('from'):
+            start = datetime.strptime(request.args['from'], '%Y-%m-%d')
+            conditions.append(column >= start)
+        if request.args.get('to'):
+            end = datetime.combine(datetime.strptime(request.args['to'], '%Y-%m-%d').date(), time.min)
+            conditions.append(column < end + timedelta(days=1))
+    except ValueError:
+        return None
+    status = request.args.get('status', 'all')
+    if status != 'all' and hasattr(model, 'status'):
+        conditions.append(model.status == status)
+    return fmt, conditions
+
+@admin_bp.route('/export/messages')
+@login_required
+@admin_required
+def export_messages():
+    """Stream contact messages as CSV or NDJSON"""
+    filters = _export_filters(ContactMessage, ContactMessage.created_at)
+    if filters is None:
+        flash('Invalid export format or date.', 'error')
+        return redirect(url_for('admin.messages'))
+    fmt, conditions = filters
+    
+    table = ContactMessage.__table__
+    fields = ['id', 'name', 'email', 'phone', 'subject', 'message', 'status', 'priority',
+              'is_read', 'read_at', 'created_at', 'updated_at']
+    statement = export_statement(table, conditions)
+    records = ([row._asdict() for row in batch] for batch in stream_batches(statement))
+    return export_response(records, fields, fmt, 'contact_messages')
+
+@admin_bp.route('/export/chatbot')
+@login_required
+@admin_required
+def export_chatbot():
+    """Stream chatbot leads with their messages as CSV or NDJSON"""
+    filters = _export_filters(ChatbotConversation, ChatbotConversation.created_at)
+    if filters is None:
+        flash('Invalid export format or date.', 'error')
+        return redirect(url_for('admin.chatbot'))
+    fmt, conditions = filters
+    
+    table = ChatbotConversation.__table__
+    fields = ['id', 'session_id', 'user_name', 'user_email', 'user_phone', 'service_requested',
+              'status', 'created_at', 'last_activity', 'messages']
+    statement = export_statement(table, conditions)
+    
+    def records():
+        for batch in stream_batches(statement):
+            # Conversations saved before packed transcripts: one query per batch
+            legacy = {}
+            legacy_ids = [row.id for row in batch if not row.transcript]
+            if legacy_ids:
+                for message in db.session.execute(
+                        db.select(ChatbotMessage.conversation_id, ChatbotMessage.sender,
+                                  ChatbotMessage.message_text, ChatbotMessage.created_at)
+                        .where(ChatbotMessage.conversation_id.in_(legacy_ids))
+                        .order_by(ChatbotMessage.conversation_id, ChatbotMessage.created_at)):
+                    legacy.setdefault(message.conversation_id, []).append(message)
+            
+            records = []
+            for row in batch:
+                messages = expand_transcript(row) if row.transcript else legacy.get(row.id, [])
+                record = row._asdict()
+                if fmt == 'csv':
+                    record['messages'] = '\n'.join(f'{m.sender}: {m.message_text}' for m in messages)
+                else:
+                    record['messages'] = [{'sender': m.sender, 'text': m.message_text,
+                                           'created_at': m.created_at.isoformat() if m.created_at else None}
+                                          for m in messages]
+                records.append(record)
+            yield records
+    
+    return export_response(records(), fields, fmt, 'chatbot_leads')
+
+@admin_bp.route('/export/pageviews')
+@login_required
+@admin_required
+def export_pageviews():
+    """Stream raw page views as CSV or NDJSON"""
+    filters = _export_filters(PageView, PageView.created_at)
+    if filters is None:
+        flash('Invalid export format or date.', 'error')
+        return redirect(url_for('admin.analytics'))
+    fmt, conditions = filters
+    if request.args.get('page'):
+        conditions.append(PageView.page_url == request.args['page'])
+    
+    table = PageView.__table__
+    fields = ['id', 'page_url', 'page_title', 'ip_address', 'user_agent', 'referrer',
+              'session_id', 'user_id', 'created_at']
+    statement = export_statement(table, conditions)
+    records = ([row._asdict() for row in batch] for batch in stream_batches(statement))
+    return export_response(records, fields, fmt, 'page_views')
+
 @admin_bp.route('/profile')
 @login_required
 @admin_required
@@ -229,20 +337,23 @@ def update_profile():
         flash('Username and email are required.', 'error')
         return redirect(url_for('admin.profile'))
     
+    # current_user is a read-only snapshot; load the row to update it
+    user = User.query.get_or_404(current_user.id)
+    
     # Check if email is being changed and if it's already taken
-    if email != current_user.email:
+    if email != user.email:
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
             flash('Email already exists.', 'error')
             return redirect(url_for('admin.profile'))
     
     # Update user info
-    current_user.username = username
-    current_user.email = email
+    user.username = username
+    user.email = email
     
     # Update password if provided
     if new_password:
-        if not current_password or not current_user.check_password(current_password):
+        if not current_password or not user.check_password(current_password):
             flash('Current password is incorrect.', 'error')
             return redirect(url_for('admin.profile'))
         
@@ -250,7 +361,7 @@ def update_profile():
             flash('New password must be at least 6 characters long.', 'error')
             return redirect(url_for('admin.profile'))
         
-        current_user.set_password(new_password)
+        user.set_password(new_password)
         flash('Password updated successfully.', 'success')
     
     db.session.commit()
@@ -1,155 +1,221 @@
 # api/routes.py
-from flask import Blueprint, request, jsonify
-from models import ChatbotConversation, ChatbotMessage, PageView, VisitorSession, db
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_login import current_user
+from models import ChatbotConversation, db
+from realtime import realtime, record_visit
+from stats import invalidate_chatbot_stats
+from transcripts import pack_lead_transcript
+from notifications import (NOTIFICATIONS_MAX_WAIT, current_cursor, format_etag, notifications_since,
+                           notify_new_activity, parse_etag, wait_for_change)
+from ingest import InvalidRecord, event_buffer, event_record, pageview_buffer, pageview_record
+from db_pool import pool_status
+from metrics import metrics_store, render_prometheus
 from datetime import datetime, timezone
+import hmac
+import json
+import time
 import uuid
-from datetime import timedelta
 
 api_bp = Blueprint('api', __name__)
 
+# Upper bound on page views + events accepted by /track/batch
+TRACK_BATCH_MAX_ITEMS = 500
+
 @api_bp.route('/track/pageview', methods=['POST'])
 def track_pageview():
     try:
         data = request.get_json()
         
-        # Create or update visitor session
-        session = VisitorSession.query.filter_by(session_id=data['session_id']).first()
-        if not session:
-            session = VisitorSession(
-                session_id=data['session_id'],
-                ip_address=request.remote_addr,
-                user_agent=data.get('user_agent'),
-                start_time=datetime.now(timezone.utc),
-                last_activity=datetime.now(timezone.utc),
-                page_views_count=1
-            )
-            db.session.add(session)
-        else:
-            session.last_activity = datetime.now(timezone.utc)
-            session.page_views_count += 1
-        
-        # Create page view record
-        page_view = PageView(
-            page_url=data['page_url'],
-            page_title=data.get('page_title'),
-            ip_address=request.remote_addr,
-            user_agent=data.get('user_agent'),
-            referrer=data.get('referrer'),
-            session_id=data['session_id']
-        )
-        
-        db.session.add(page_view)
-        db.session.commit()
+        # Queue the hit; the buffer writes page views and folds session
+        # updates in bulk on its own schedule
+        record = pageview_record(data, request.remote_addr)
+        pageview_buffer.submit(record)
+        record_visit(record['session_id'], record['ip_address'])
         
         return jsonify({'success': True})
+    except InvalidRecord as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @api_bp.route('/track/event', methods=['POST'])
 def track_event():
     try:
         data = request.get_json()
-        # Store event data (you might want to create an Event model for this)
-        # For now, just return success
+        event_buffer.submit(event_record(data))
         return jsonify({'success': True})
+    except InvalidRecord as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _tracked_items(items, name):
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise InvalidRecord(f'{name} must be a list of objects')
+    return items
+
+def _rollback_batch():
+    db.session.rollback()
+    # Drop what the buffers cached from the rolled-back transaction (event type ids)
+    pageview_buffer.rolled_back()
+    event_buffer.rolled_back()
+
+@api_bp.route('/track/batch', methods=['POST'])
+def track_batch():
+    """Ingest a batch of page views and events from the beacon tracker"""
+    try:
+        # navigator.sendBeacon may not label the body as JSON
+        data = request.get_json(force=True, silent=True) or {}
+        if not isinstance(data, dict):
+            raise InvalidRecord('Expected a JSON object')
+        session_id = data.get('session_id')
+        user_agent = data.get('user_agent') or request.headers.get('User-Agent')
+        
+        pageviews = _tracked_items(data.get('pageviews') or [], 'pageviews')
+        events = _tracked_items(data.get('events') or [], 'events')
+        if len(pageviews) + len(events) > TRACK_BATCH_MAX_ITEMS:
+            return jsonify({'success': False, 'error': 'Batch too large'}), 413
+        
+        pageview_records = [
+            pageview_record(dict({'session_id': session_id, 'user_agent': user_agent}, **item), request.remote_addr)
+            for item in pageviews
+        ]
+        event_records = [
+            event_record(dict({'session_id': session_id}, **item))
+            for item in events
+        ]
+        
+        # One transaction for the whole batch
+        if pageview_records:
+            pageview_buffer.write_batch(pageview_records)
+        if event_records:
+            event_buffer.write_batch(event_records)
+        db.session.commit()
+        
+        if pageview_records:
+            record_visit(session_id, request.remote_addr)
+        
+        return jsonify({'success': True, 'pageviews': len(pageview_records), 'events': len(event_records)})
+    except InvalidRecord as e:
+        _rollback_batch()
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
+        _rollback_batch()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @api_bp.route('/analytics/realtime', methods=['GET'])
 def realtime_analytics():
     try:
-        # Get real-time statistics
-        total_visitors = VisitorSession.query.count()
-        total_page_views = PageView.query.count()
-        active_sessions = VisitorSession.query.filter(
-            VisitorSession.last_activity >= datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=30)
-        ).count()
-        
-        return jsonify({
-            'total_visitors': total_visitors,
-            'total_page_views': total_page_views,
-            'active_sessions': active_sessions,
-            'timestamp': datetime.now(timezone.utc).isoformat()
-        })
+        # Shared snapshot, refreshed on a schedule by the realtime aggregator
+        return jsonify(realtime.snapshot())
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@api_bp.route('/analytics/stream', methods=['GET'])
+def realtime_analytics_stream():
+    """Server-Sent Events stream of the realtime analytics snapshot"""
+    if not current_user.is_authenticated or not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin access required'}), 403
+    
+    # End each stream before the worker timeout; EventSource reconnects on its own
+    deadline = time.monotonic() + current_app.config['REALTIME_STREAM_MAX_AGE']
+    
+    def events():
+        yield 'retry: 2000\n\n'
+        for snapshot in realtime.subscribe():
+            if snapshot is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f'data: {json.dumps(snapshot)}\n\n'
+            if time.monotonic() > deadline:
+                return
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.now(timezone.utc).isoformat()
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'database': pool_status(db.engine)
     })
 
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Request and SQL metrics of every worker in Prometheus text format"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'success': False, 'error': 'Invalid metrics token'}), 401
+    if not token and not current_app.config.get('METRICS_PUBLIC'):
+        # Per-route latency and pool numbers are not public in production
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    if not current_app.config['METRICS_ENABLED']:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+    
+    response = Response(render_prometheus(metrics_store.collect()), mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.cache_control.no_store = True
+    return response
+
+@api_bp.route('/notifications', methods=['GET'])
+def notifications():
+    """New contact messages and chatbot leads for admins; ?wait=<seconds> long-polls"""
+    if not current_user.is_authenticated or not current_user.is_admin:
+        # Visitors have nothing to be notified about; tell the script to stop polling
+        response = jsonify([])
+        response.headers['X-Notifications'] = 'off'
+        response.cache_control.private = True
+        response.cache_control.max_age = 3600
+        return response
+    
+    try:
+        seen = parse_etag(request.headers.get('If-None-Match'))
+        cursor = current_cursor()
+        wait = max(0.0, min(request.args.get('wait', 0, type=float), NOTIFICATIONS_MAX_WAIT))
+        if seen == cursor and wait:
+            cursor = wait_for_change(cursor, wait)
+        
+        if seen == cursor:
+            response = current_app.response_class(status=304)
+        else:
+            # The first poll only learns the cursor; history is in the admin panel
+            response = jsonify(notifications_since(seen) if seen else [])
+        response.set_etag(format_etag(cursor))
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @api_bp.route('/chatbot/save', methods=['POST'])
 def save_chatbot_conversation():
     try:
         data = request.get_json()
         
-        # Create new conversation
+        # Create new conversation with its packed transcript; a single row per lead
         conversation = ChatbotConversation(
             session_id=str(uuid.uuid4()),
             user_name=data.get('name'),
             user_email=data.get('email'),
             user_phone=data.get('phone'),
             service_requested=data.get('service'),
-            status='active'
+            status='active',
+            transcript=pack_lead_transcript(data)
         )
         
         db.session.add(conversation)
-        db.session.flush()  # Get the ID without committing
-        
-        # Add bot messages
-        bot_messages = [
-            "👋 Hello! I'm Aura Assistant, your friendly AI helper!",
-            f"Nice to meet you, {data.get('name')}! 🎉",
-            "What's your email address?",
-            "Thank you! 📧",
-            "What's your contact number?",
-            "Thank you! 📞",
-            "What service do you need?",
-            f"Perfect! I've noted that you need {data.get('service')}. ✅",
-            "Thank you for providing your information! Our team will contact you soon. 🚀"
-        ]
-        
-        user_messages = [
-            data.get('name'),
-            data.get('email'),
-            data.get('phone'),
-            data.get('service')
-        ]
-        
-        # Add conversation messages
-        message_order = [
-            ('bot', bot_messages[0]),
-            ('user', data.get('name')),
-            ('bot', bot_messages[1]),
-            ('user', data.get('email')),
-            ('bot', bot_messages[2]),
-            ('bot', bot_messages[3]),
-            ('user', data.get('phone')),
-            ('bot', bot_messages[4]),
-            ('bot', bot_messages[5]),
-            ('bot', bot_messages[6]),
-            ('user', data.get('service')),
-            ('bot', bot_messages[7]),
-            ('bot', bot_messages[8])
-        ]
-        
-        for sender, message_text in message_order:
-            message = ChatbotMessage(
-                conversation_id=conversation.id,
-                sender=sender,
-                message_text=message_text
-            )
-            db.session.add(message)
-        
+        db.session.flush()  # Get the ID without a reload after commit
+        conversation_id = conversation.id
         db.session.commit()
+        invalidate_chatbot_stats()
+        notify_new_activity()
         
         return jsonify({
             'success': True,
-            'conversation_id': conversation.id,
+            'conversation_id': conversation_id,
             'message': 'Conversation saved successfully'
         })
         
@@ -3,9 +3,14 @@ from flask import Flask, redirect
 from extensions import db, login_manager, mail
 from flask_migrate import Migrate
 from models import User, Event   # Import User and Event models
+from boot import BootTimer, database_is_empty, schema_is_current, stamp_head
+from runtime_config import engine_options, server_plan
+from shared_state import process_threads_held
+import click
 import os
 
 def create_app():
+    boot = BootTimer()
     app = Flask(__name__)
     
     # Basic configuration
@@ -25,36 +30,73 @@ def create_app():
     else:
         app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///aura.db"
     
-    # Production settings
-    if os.getenv("RENDER"):
-        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-            "pool_pre_ping": True,
-            "pool_recycle": 300,
-        }
+    # Pool sizing shared with gunicorn.conf.py (workers x pool fits DB_MAX_CONNECTIONS)
+    plan = server_plan()
+    app.config['SERVER_PLAN'] = plan
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], plan)
     
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
     # Email Configuration
-    app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-    app.config['MAIL_PORT'] = 587
-    app.config['MAIL_USE_TLS'] = True
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'True').lower() == 'true'
     app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', 'gautamvinay939@gmail.com')
     app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', '')  # Set this in environment
     app.config['MAIL_DEFAULT_SENDER'] = ('Aura', 'gautamvinay939@gmail.com')
     
+    boot.mark('config')
+    
     # Initialize extensions
     from extensions import init_extensions
     init_extensions(app)
     
+    # WAL and tuned pragmas when the database is SQLite
+    from sqlite_tuning import init_sqlite
+    init_sqlite(app)
+    
+    # Shared state used to invalidate per-worker caches
+    from shared_state import init_shared_state
+    init_shared_state(app)
+    
+    # Per-route latency and SQL metrics (/api/metrics)
+    from metrics import init_metrics
+    init_metrics(app)
+    
+    # Buffered analytics ingestion
+    from ingest import init_ingest
+    init_ingest(app)
+    
+    # Shared realtime analytics snapshot
+    from realtime import realtime
+    realtime.init_app(app)
+    
+    # Retention for the raw analytics tables (flask analytics archive)
+    from archive import init_archive
+    init_archive(app)
+    
+    # Background email delivery
+    from outbox import init_outbox
+    init_outbox(app)
+    
     # Flask-Migrate initialization
     migrate = Migrate(app, db)
+    boot.mark('extensions')
 
      #  IMPORT MODELS (CRITICAL)
     import models
 
-    #  CREATE TABLES
+    #  CREATE TABLES (skipped when the database is already at the migration head;
+    #  a new database is stamped there, older ones are upgraded by `flask release`)
+    app.config.setdefault('BOOT_SKIP_CREATE_ALL', os.getenv('BOOT_SKIP_CREATE_ALL', 'true').lower() == 'true')
     with app.app_context():
-        db.create_all()
+        versions_dir = os.path.join(app.root_path, 'migrations', 'versions')
+        if not (app.config['BOOT_SKIP_CREATE_ALL'] and schema_is_current(db, versions_dir)):
+            empty = database_is_empty(db)
+            db.create_all()
+            if empty:
+                stamp_head(db, versions_dir)
+    boot.mark('schema')
 
     # Register blueprints
     from main.routes import bp as main_bp
@@ -71,15 +113,40 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(admin_bp, url_prefix="/admin")
     app.register_blueprint(api_bp, url_prefix="/api")
+    boot.mark('blueprints')
+    
+    # CLI commands (flask analytics ...)
+    from cli import register_commands
+    register_commands(app)
+    
+    # Fingerprinted static assets (flask assets build)
+    from assets import assets
+    assets.init_app(app)
+    
+    # Rendered-page cache for the marketing routes
+    from page_cache import page_cache
+    page_cache.init_app(app)
     
     # Global context processor to make admin_exists available in all templates
     @app.context_processor
     def inject_admin_exists():
-        with app.app_context():
-            from models import User
-            admin_exists = User.query.filter_by(is_admin=True).first() is not None
-            return dict(admin_exists=admin_exists)
+        from auth.routes import admin_exists
+        return dict(admin_exists=admin_exists())
+    
+    # gzip/brotli for HTML, JSON and streamed responses
+    from compression import init_compression
+    init_compression(app)
+    boot.mark('caches')
+    
+    # Render the cached pages once so the first visitors get a cache hit;
+    # CLI commands don't serve pages, so they skip it. The warm-up requests
+    # must not start background threads (under gunicorn this is the master)
+    if app.config['PAGE_CACHE_WARM'] and click.get_current_context(silent=True) is None:
+        with process_threads_held():
+            page_cache.warm()
+    boot.mark('warm')
     
+    app.extensions['boot_timings'] = boot
     return app
 
 if __name__ == '__main__':
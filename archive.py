@@ -0,0 +1,141 @@
+# archive.py
+"""Retention for the raw analytics tables.
+
+``archive_analytics`` moves ``page_views`` and ``visitor_sessions`` rows
+older than a whole number of days (sessions by their last activity, so
+long-lived sessions that are still active stay) into gzip-compressed NDJSON
+files, one per table and month (``page_views-2025-01.ndjson.gz``), and deletes them in
+small batches with a commit after each so no lock is held for long. Every
+batch is synced to disk before its rows are deleted. ``restore_archive``
+loads a month file back into the database.
+
+The rollup tables are left alone, so totals and top pages still include
+archived traffic. ``rollups.rebuild_rollups`` only replaces days that still
+have raw rows, which is why the cutoff is always a UTC midnight.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+from db_helpers import upsert
+from extensions import db
+from models import PageView, VisitorSession
+
+# table name -> (model, column the retention cutoff applies to)
+ARCHIVED_TABLES = {
+    'page_views': (PageView, 'created_at'),
+    'visitor_sessions': (VisitorSession, 'last_activity'),
+}
+
+_ARCHIVE_NAME = re.compile(r'^(?P<table>\w+)-(?P<month>\d{4}-\d{2})\.ndjson\.gz$')
+
+
+def init_archive(app):
+    app.config.setdefault('ANALYTICS_RETENTION_DAYS', int(os.getenv('ANALYTICS_RETENTION_DAYS', 90)))
+    app.config.setdefault('ANALYTICS_ARCHIVE_DIR', os.getenv('ANALYTICS_ARCHIVE_DIR') or os.path.join(app.instance_path, 'archive'))
+    app.config.setdefault('ANALYTICS_ARCHIVE_BATCH_SIZE', 1000)
+
+
+def retention_cutoff(older_than_days, today=None):
+    """UTC midnight ``older_than_days`` days ago, as a naive datetime."""
+    today = today or datetime.now(timezone.utc).date()
+    return datetime.combine(today - timedelta(days=older_than_days), time.min)
+
+
+def archive_path(archive_dir, table_name, month):
+    return os.path.join(archive_dir, f'{table_name}-{month}.ndjson.gz')
+
+
+def _encode(row):
+    return json.dumps({key: value.isoformat() if isinstance(value, (datetime, date)) else value
+                       for key, value in row.items()}, separators=(',', ':'), ensure_ascii=False)
+
+
+def _append(path, lines):
+    # Each batch becomes its own gzip member; readers see one stream
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            gz.write(''.join(line + '\n' for line in lines).encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_table(table_name, cutoff, archive_dir, batch_size=1000):
+    """Archive and delete rows of ``table_name`` older than ``cutoff``; returns the row count."""
+    model, column_name = ARCHIVED_TABLES[table_name]
+    table = model.__table__
+    column = table.c[column_name]
+    os.makedirs(archive_dir, exist_ok=True)
+
+    archived = 0
+    while True:
+        rows = db.session.execute(
+            db.select(table).where(column < cutoff).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return archived
+
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row[column_name].strftime('%Y-%m'), []).append(_encode(row))
+        for month, lines in by_month.items():
+            _append(archive_path(archive_dir, table_name, month), lines)
+
+        db.session.execute(table.delete().where(table.c.id.in_([row['id'] for row in rows])))
+        db.session.commit()
+        archived += len(rows)
+
+
+def archive_analytics(older_than_days, archive_dir, batch_size=1000):
+    """Archive every table in ``ARCHIVED_TABLES``; returns ``{table: rows archived}``."""
+    cutoff = retention_cutoff(older_than_days)
+    return {name: archive_table(name, cutoff, archive_dir, batch_size) for name in ARCHIVED_TABLES}
+
+
+def restore_archive(path, batch_size=1000):
+    """Load an archive file back into its table and delete the file; returns the row count.
+
+    Rows get fresh primary keys because ids freed by archiving may have been
+    reused. The file is only removed once every row is committed, so a
+    failed restore can simply be re-run.
+    """
+    match = _ARCHIVE_NAME.match(os.path.basename(path))
+    if not match or match.group('table') not in ARCHIVED_TABLES:
+        raise ValueError(f'{path} is not an analytics archive file')
+    model, _ = ARCHIVED_TABLES[match.group('table')]
+    table = model.__table__
+    datetime_columns = {c.name for c in table.columns if isinstance(c.type, db.DateTime)}
+
+    def insert(rows):
+        if model is VisitorSession:
+            # The visitor came back with the same session_id after it was
+            # archived: fold the archived page views into the live row
+            upsert(model, rows, ['session_id'], increment=['page_views_count'])
+        else:
+            db.session.execute(table.insert(), rows)
+
+    restored, batch = 0, []
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                row.pop('id', None)
+                for name in datetime_columns & row.keys():
+                    if row[name] is not None:
+                        row[name] = datetime.fromisoformat(row[name])
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    insert(batch)
+                    restored += len(batch)
+                    batch = []
+        if batch:
+            insert(batch)
+            restored += len(batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    os.remove(path)
+    return restored
@@ -0,0 +1,165 @@
+# assets.py
+"""Fingerprinted, minified and precompressed static assets.
+
+``flask assets build`` copies every file under ``static/css``, ``static/js``
+and ``static/img`` to ``static/dist`` with a content hash in its name
+(``css/style.3f2a1b9c.css``). CSS and JS are minified first and written
+next to ``.gz`` (and ``.br`` when the ``brotli`` package is installed)
+variants, and ``manifest.json`` maps each source path to its built name.
+
+At runtime ``url_for('static', filename='css/style.css')`` is rewritten to
+the built file whenever the manifest lists it, so templates stay
+unchanged. ``/static/dist/...`` is served with a one-year ``immutable``
+``Cache-Control`` and the best precompressed variant the client accepts.
+Without a manifest, or with ``ASSETS_ENABLED`` off, the original files are
+served as before.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, request, send_from_directory
+
+# Both are in requirements.txt; builds degrade gracefully without them
+try:
+    import brotli
+except ImportError:  # .br variants are skipped
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # JS is only precompressed
+    rjsmin = None
+
+ASSET_DIRS = ('css', 'js', 'img')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt')
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# Strings and comments, so whitespace is only touched in plain CSS
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.DOTALL)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def _tighten_css(code):
+    return _CSS_PUNCTUATION.sub(r'\1', _CSS_SPACE.sub(' ', code)).replace(';}', '}')
+
+
+def minify_css(source):
+    parts, position = [], 0
+    for m in _CSS_TOKENS.finditer(source):
+        parts.append(_tighten_css(source[position:m.start()]))
+        if m.group(1):
+            parts.append(m.group(1))
+        position = m.end()
+    parts.append(_tighten_css(source[position:]))
+    return ''.join(parts).strip()
+
+
+def minify_js(source):
+    return rjsmin.jsmin(source) if rjsmin is not None else source
+
+
+def _fingerprint(path, data):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+
+
+def build_assets(static_folder):
+    """Build ``static/dist`` from the source assets; returns the manifest.
+
+    Files from earlier builds are kept, so workers still running with the
+    previous manifest (and pages cached with its URLs) keep working.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for top in ASSET_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(static_folder, top)):
+            for filename in sorted(filenames):
+                source = os.path.join(dirpath, filename)
+                name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    data = f.read()
+                if name.endswith('.css'):
+                    data = minify_css(data.decode('utf-8')).encode('utf-8')
+                elif name.endswith('.js'):
+                    data = minify_js(data.decode('utf-8')).encode('utf-8')
+
+                built = _fingerprint(name, data)
+                target = os.path.join(dist, built)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(data)
+                if name.endswith(COMPRESSIBLE):
+                    with open(target + '.gz', 'wb') as f:
+                        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        with open(target + '.br', 'wb') as f:
+                            f.write(brotli.compress(data))
+                manifest[name] = built
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class Assets:
+
+    def __init__(self):
+        self.app = None
+        self.manifest = {}
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_ENABLED', os.getenv('ASSETS_ENABLED', str(not app.debug)).lower() == 'true')
+        app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+        self.app = app
+        self.load_manifest()
+        app.url_defaults(self._rewrite_static)
+        app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', 'static_dist', self.serve)
+
+    def load_manifest(self):
+        self.manifest = {}
+        if not self.app.config['ASSETS_ENABLED']:
+            return
+        try:
+            with open(os.path.join(self.app.static_folder, DIST_DIR, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    def _rewrite_static(self, endpoint, values):
+        if endpoint == 'static' and self.manifest:
+            built = self.manifest.get(values.get('filename'))
+            if built:
+                values['filename'] = f'{DIST_DIR}/{built}'
+
+    def serve(self, filename):
+        if filename == MANIFEST or filename.endswith(('.gz', '.br')):
+            abort(404)
+        directory = os.path.join(self.app.static_folder, DIST_DIR)
+        max_age = self.app.config['ASSETS_MAX_AGE']
+        encoding = suffix = None
+        if filename.endswith(COMPRESSIBLE):
+            accepted = request.accept_encodings
+            for candidate, candidate_suffix in (('br', '.br'), ('gzip', '.gz')):
+                if accepted[candidate] and os.path.isfile(os.path.join(directory, filename + candidate_suffix)):
+                    encoding, suffix = candidate, candidate_suffix
+                    break
+
+        if encoding:
+            response = send_from_directory(directory, filename + suffix,
+                                           mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                                           conditional=True, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(directory, filename, conditional=True, max_age=max_age)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.immutable = True
+        return response
+
+
+assets = Assets()
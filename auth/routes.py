@@ -4,9 +4,24 @@ from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime, timezone
 from models import User
 from extensions import db
+from shared_state import CachedValue, VersionStamp
 
 auth_bp = Blueprint('auth', __name__)
 
+# Whether an admin account exists. Cached per process; creating an admin
+# bumps the stamp so every worker re-checks once.
+_admin_exists = CachedValue(
+    lambda: User.query.filter_by(is_admin=True).first() is not None,
+    ttl=float('inf'),
+    stamp=VersionStamp('admin-exists'),
+)
+
+def admin_exists():
+    return _admin_exists.get()
+
+def invalidate_admin_exists():
+    _admin_exists.invalidate()
+
 @auth_bp.route('/setup-admin', methods=['GET', 'POST'])
 def setup_admin():
     """One-time admin registration - only works if no admin exists"""
@@ -51,6 +66,7 @@ def setup_admin():
         
         db.session.add(admin_user)
         db.session.commit()
+        invalidate_admin_exists()
         
         # Log in admin
         login_user(admin_user)
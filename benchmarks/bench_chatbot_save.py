@@ -0,0 +1,107 @@
+# benchmarks/bench_chatbot_save.py
+"""Saves per second for /api/chatbot/save: per-message rows versus packed transcripts.
+
+The "before" path reproduces the original handler, which wrote one
+ChatbotMessage ORM object per line (14 rows per lead). The "after" path
+does what the endpoint does now and writes a single conversation row with
+a packed transcript.
+
+    python benchmarks/bench_chatbot_save.py --leads 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_app(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['PAGE_CACHE_ENABLED'] = 'false'
+    from app import create_app
+    return create_app()
+
+
+def sample_lead(i):
+    return {'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'phone': f'+91 90000{i:05d}', 'service': 'SEO Services'}
+
+
+def save_per_message(data):
+    from extensions import db
+    from models import ChatbotConversation, ChatbotMessage
+    from transcripts import BOT_LINES, LEAD_SCRIPT
+
+    conversation = ChatbotConversation(
+        session_id=str(uuid.uuid4()),
+        user_name=data.get('name'),
+        user_email=data.get('email'),
+        user_phone=data.get('phone'),
+        service_requested=data.get('service'),
+        status='active'
+    )
+    db.session.add(conversation)
+    db.session.flush()
+    for step in LEAD_SCRIPT:
+        if isinstance(step, int):
+            sender, text = 'bot', BOT_LINES[step].format(name=data.get('name'), service=data.get('service'))
+        else:
+            sender, text = 'user', data.get(step)
+        db.session.add(ChatbotMessage(conversation_id=conversation.id, sender=sender, message_text=text))
+    db.session.commit()
+
+
+def save_packed(data):
+    from extensions import db
+    from models import ChatbotConversation
+    from transcripts import pack_lead_transcript
+
+    db.session.add(ChatbotConversation(
+        session_id=str(uuid.uuid4()),
+        user_name=data.get('name'),
+        user_email=data.get('email'),
+        user_phone=data.get('phone'),
+        service_requested=data.get('service'),
+        status='active',
+        transcript=pack_lead_transcript(data)
+    ))
+    db.session.commit()
+
+
+def timed(save, leads):
+    start = time.perf_counter()
+    for i in range(leads):
+        save(sample_lead(i))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--leads', type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='aura-bench-')
+    app = make_app(os.path.join(workdir, 'bench.db'))
+
+    with app.app_context():
+        from extensions import db
+        from models import ChatbotConversation, ChatbotMessage
+
+        results = []
+        for label, save in (('before (rows per message) ', save_per_message),
+                            ('after  (packed transcript)', save_packed)):
+            elapsed = timed(save, args.leads)
+            rows = ChatbotConversation.query.count() + ChatbotMessage.query.count()
+            results.append((label, args.leads / elapsed, rows / args.leads))
+            ChatbotMessage.query.delete()
+            ChatbotConversation.query.delete()
+            db.session.commit()
+
+    for label, rate, rows_per_lead in results:
+        print(f'{label} : {rate:8.0f} saves/s, {rows_per_lead:.0f} rows per lead')
+
+
+if __name__ == '__main__':
+    main()
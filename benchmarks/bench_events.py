@@ -0,0 +1,87 @@
+# benchmarks/bench_events.py
+"""Insert throughput of the analytics event store.
+
+Compares one transaction per event (what a naive /api/track/event handler
+would do) with the batched append path used by the ingestion buffer.
+
+    python benchmarks/bench_events.py --events 20000 --batch-size 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_app(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['INGEST_BUFFER_ENABLED'] = 'false'
+    from app import create_app
+    return create_app()
+
+
+def sample_payload(i):
+    return {
+        'event_type': ('click', 'form_submit', 'page_exit')[i % 3],
+        'data': {'element': 'A', 'text': f'Link {i}', 'href': f'/services#{i}'},
+        'page_url': f'/page/{i % 25}',
+        'session_id': f'session_{i % 500}',
+    }
+
+
+def bench_per_event(n):
+    from extensions import db
+    from ingest import event_buffer, event_record
+    from models import AnalyticsEvent
+
+    start = time.perf_counter()
+    for i in range(n):
+        record = event_record(sample_payload(i))
+        type_id = event_buffer.type_ids({record['event_type']})[record['event_type']]
+        db.session.add(AnalyticsEvent(
+            event_type_id=type_id,
+            page_url=record['page_url'],
+            session_id=record['session_id'],
+            payload=record['payload'],
+            created_at=record['created_at'],
+        ))
+        db.session.commit()
+    return time.perf_counter() - start
+
+
+def bench_batched(n, batch_size):
+    from extensions import db
+    from ingest import event_buffer, event_record
+
+    start = time.perf_counter()
+    for offset in range(0, n, batch_size):
+        batch = [event_record(sample_payload(i)) for i in range(offset, min(n, offset + batch_size))]
+        event_buffer.write_batch(batch)
+        db.session.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='aura-bench-')
+    app = make_app(os.path.join(workdir, 'bench.db'))
+
+    with app.app_context():
+        # The per-event path is far slower, so it runs on a tenth of the sample
+        per_event_n = max(1, args.events // 10)
+        per_event = bench_per_event(per_event_n)
+        batched = bench_batched(args.events, args.batch_size)
+
+    print(f'per-event commit : {per_event_n / per_event:10.0f} inserts/s ({per_event_n} events)')
+    print(f'batched append   : {args.events / batched:10.0f} inserts/s ({args.events} events, batch {args.batch_size})')
+    print(f'speedup          : {(args.events / batched) / (per_event_n / per_event):10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
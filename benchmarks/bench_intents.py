@@ -0,0 +1,84 @@
+# benchmarks/bench_intents.py
+"""Messages matched per second: linear substring scan versus the compiled intent matcher.
+
+The "before" path reproduces the original /ai-chat handler, which rebuilt
+its responses dict per call and tested every key with ``in``. The "after"
+path is ``intents.IntentMatcher`` with its response cache disabled, so
+only the single-pass regex is measured. Synthetic intents are added to
+show how each approach scales with the number of intents.
+
+    python benchmarks/bench_intents.py --intents 4 40 400 --messages 20000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import DEFAULT_FALLBACK, DEFAULT_INTENTS, IntentMatcher  # noqa: E402
+
+
+def build_intents(count, rng):
+    intents = [(name, keywords, response) for name, _, keywords, response in DEFAULT_INTENTS]
+    while len(intents) < count:
+        keyword = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        intents.append((f'intent-{len(intents)}', [keyword], f'Reply about {keyword}.'))
+    return intents[:max(count, 1)]
+
+
+def build_messages(count, intents, rng):
+    words = ['please', 'tell', 'me', 'about', 'your', 'team', 'website', 'project', 'today', 'thanks']
+    messages = []
+    for _ in range(count):
+        message = [rng.choice(words) for _ in range(rng.randint(4, 14))]
+        if rng.random() < 0.5:
+            message.insert(rng.randrange(len(message)), rng.choice(rng.choice(intents)[1]))
+        messages.append(' '.join(message))
+    return messages
+
+
+def linear_scan(intents):
+    def reply(message):
+        responses = {keyword: response for _, keywords, response in intents for keyword in keywords}
+        responses['default'] = DEFAULT_FALLBACK
+        user_lower = message.lower()
+        for key in responses:
+            if key in user_lower:
+                return responses[key]
+        return responses['default']
+    return reply
+
+
+def timed(reply, messages):
+    start = time.perf_counter()
+    for message in messages:
+        reply(message)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--intents', type=int, nargs='+', default=[4, 40, 400])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for count in args.intents:
+        intents = build_intents(count, rng)
+        messages = build_messages(args.messages, intents, rng)
+        matcher = IntentMatcher(intents, DEFAULT_FALLBACK)
+
+        before, after = linear_scan(intents), matcher._respond
+        mismatches = sum(before(m) != after(m) for m in messages)
+        before_rate = len(messages) / timed(before, messages)
+        after_rate = len(messages) / timed(after, messages)
+        print(f'{len(intents):5d} intents: before {before_rate:10.0f} msg/s, after {after_rate:10.0f} msg/s '
+              f'({after_rate / before_rate:.1f}x), {mismatches} differing replies')
+
+
+if __name__ == '__main__':
+    main()
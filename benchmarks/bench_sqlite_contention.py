@@ -0,0 +1,159 @@
+# benchmarks/bench_sqlite_contention.py
+"""Multi-process write contention on SQLite: default journal versus the WAL profile.
+
+Writer processes stand in for gunicorn workers recording page views (one
+transaction per hit: insert the row, bump the daily counter); reader
+processes run the analytics dashboard query in a loop. Each profile runs
+for a fixed time on a fresh database and reports committed writes, reads
+and ``database is locked`` errors.
+
+The "before" profile is SQLAlchemy's stock SQLite engine (rollback journal,
+``synchronous=FULL``); "after" adds the pragmas from ``sqlite_tuning``
+with the app's default settings. Both wait up to ``--lock-timeout``
+seconds for a lock (5 is the default of the driver and of the profile);
+lower it to see how much each profile depends on waiting.
+
+    python benchmarks/bench_sqlite_contention.py --writers 4 --readers 2 --seconds 5
+    python benchmarks/bench_sqlite_contention.py --lock-timeout 0.01
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGES = ['/', '/about', '/services', '/contact', '/blog', '/pricing']
+
+DEFAULT_CONFIG = {
+    'SQLITE_WAL': True,
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'SQLITE_CACHE_SIZE_KB': 20000,
+    'SQLITE_JOURNAL_SIZE_LIMIT': 64 * 1024 * 1024,
+}
+
+
+def make_engine(db_path, tuned, lock_timeout=5.0):
+    from sqlalchemy import create_engine
+    from sqlite_tuning import install_pragmas, sqlite_pragmas
+
+    engine = create_engine(f'sqlite:///{db_path}', connect_args={'timeout': lock_timeout})
+    if tuned:
+        install_pragmas(engine, sqlite_pragmas(dict(DEFAULT_CONFIG, SQLITE_BUSY_TIMEOUT_MS=lock_timeout * 1000)))
+    return engine
+
+
+def create_schema(db_path, tuned):
+    from extensions import db
+    from models import PageView, PageViewDaily
+
+    engine = make_engine(db_path, tuned)
+    db.metadata.create_all(engine, tables=[PageView.__table__, PageViewDaily.__table__])
+    engine.dispose()
+
+
+def is_lock_error(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def writer(db_path, tuned, lock_timeout, deadline, worker, results):
+    from sqlalchemy import insert, update
+    from sqlalchemy.exc import OperationalError
+    from models import PageView, PageViewDaily
+
+    engine = make_engine(db_path, tuned, lock_timeout)
+    today = datetime.now(timezone.utc).date()
+    writes = errors = i = 0
+    while time.time() < deadline:
+        page = PAGES[i % len(PAGES)]
+        i += 1
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(PageView.__table__).values(
+                    page_url=page, page_title=page, ip_address='203.0.113.7',
+                    user_agent='bench', session_id=f'w{worker}-{i // 5}',
+                    created_at=datetime.now(timezone.utc),
+                ))
+                bumped = connection.execute(update(PageViewDaily.__table__)
+                                            .where(PageViewDaily.page_url == page, PageViewDaily.day == today)
+                                            .values(views=PageViewDaily.views + 1)).rowcount
+                if not bumped:
+                    connection.execute(insert(PageViewDaily.__table__).prefix_with('OR IGNORE')
+                                       .values(page_url=page, day=today, views=1))
+            writes += 1
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            errors += 1
+    engine.dispose()
+    results.put(('write', writes, errors))
+
+
+def reader(db_path, tuned, lock_timeout, deadline, results):
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import OperationalError
+    from models import PageView
+
+    engine = make_engine(db_path, tuned, lock_timeout)
+    query = select(PageView.page_url, func.count()).where(
+        PageView.created_at >= datetime.now(timezone.utc) - timedelta(days=1)
+    ).group_by(PageView.page_url)
+    reads = errors = 0
+    while time.time() < deadline:
+        try:
+            with engine.connect() as connection:
+                connection.execute(query).all()
+            reads += 1
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            errors += 1
+    engine.dispose()
+    results.put(('read', reads, errors))
+
+
+def run(db_path, tuned, lock_timeout, writers, readers, seconds):
+    create_schema(db_path, tuned)
+    results = multiprocessing.Queue()
+    # Everyone starts together once the processes are up
+    deadline = time.time() + 1 + seconds
+    processes = [multiprocessing.Process(target=writer, args=(db_path, tuned, lock_timeout, deadline, n, results))
+                 for n in range(writers)]
+    processes += [multiprocessing.Process(target=reader, args=(db_path, tuned, lock_timeout, deadline, results))
+                  for _ in range(readers)]
+    for p in processes:
+        p.start()
+    totals = {'write': [0, 0], 'read': [0, 0]}
+    for _ in processes:
+        kind, done, errors = results.get()
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    for p in processes:
+        p.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--lock-timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='aura-bench-')
+    for label, tuned in (('before (rollback journal)', False), ('after  (WAL profile)     ', True)):
+        totals = run(os.path.join(workdir, f'{"wal" if tuned else "default"}.db'),
+                     tuned, args.lock_timeout, args.writers, args.readers, args.seconds)
+        (writes, write_errors), (reads, read_errors) = totals['write'], totals['read']
+        print(f'{label} : {writes / args.seconds:8.0f} writes/s, {reads / args.seconds:8.0f} reads/s, '
+              f'{write_errors + read_errors} lock errors ({write_errors} writes, {read_errors} reads)')
+
+
+if __name__ == '__main__':
+    main()
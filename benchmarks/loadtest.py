@@ -0,0 +1,363 @@
+# benchmarks/loadtest.py
+"""Load test for the hot endpoints, with a JSON baseline and a regression check.
+
+Boots ``wsgi.application`` on a local threaded werkzeug server against a
+scratch database (a fresh SQLite file unless ``--database-url`` points at a
+throwaway Postgres database), seeds an admin account and some traffic, and
+runs virtual users for ``--duration`` seconds, picking requests at random
+by weight:
+
+- ``--concurrency`` anonymous visitors (``VISITOR_MIX``): marketing pages,
+  page-view tracking, the chatbot and contact form posts, without a login,
+  so they take the page cache and the anonymous path real visitors take;
+- ``--admins`` admins (``ADMIN_MIX``), who log in first: the dashboard,
+  analytics, message and chatbot lists, and the odd re-login.
+
+Choices are seeded, so two runs send the same sequence of requests.
+
+Throughput, p50/p95/p99 latency and errors are reported per endpoint.
+``--save`` writes them as a JSON baseline; ``--compare`` checks a run
+against one and exits with status 1 when an endpoint's p95 grew or its
+throughput fell by more than ``--tolerance``, or it started failing.
+
+    python benchmarks/loadtest.py --duration 20 --save baseline.json
+    python benchmarks/loadtest.py --duration 20 --compare baseline.json
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000   # a running server
+
+The clients share the server's process (and GIL) unless ``--url`` is used,
+so absolute numbers are lower than under gunicorn; compare runs made the
+same way on the same machine.
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ADMIN_EMAIL = 'loadtest@example.com'
+ADMIN_PASSWORD = 'loadtest-password'
+
+MARKETING_PAGES = ['/', '/about', '/services', '/webdev', '/software', '/marketing', '/seo', '/contact']
+CHAT_MESSAGES = ['hi', 'hello there', 'what services do you offer?', 'price for a website', 'can you help with SEO?']
+
+
+def _json(payload):
+    return json.dumps(payload).encode('utf-8'), 'application/json'
+
+
+def _form(payload):
+    return urlencode(payload).encode('utf-8'), 'application/x-www-form-urlencoded'
+
+
+def marketing_page(rng, user):
+    return 'GET', rng.choice(MARKETING_PAGES), None
+
+
+def track_pageview(rng, user):
+    return 'POST', '/api/track/pageview', _json({
+        'page_url': rng.choice(MARKETING_PAGES),
+        'page_title': 'Aura',
+        'session_id': f'loadtest-{user}-{rng.randrange(20)}',
+        'user_agent': 'loadtest',
+        'referrer': 'https://www.google.com/',
+    })
+
+
+def ai_chat(rng, user):
+    return 'POST', '/ai-chat', _json({'message': rng.choice(CHAT_MESSAGES)})
+
+
+def chatbot_save(rng, user):
+    n = rng.randrange(1000000)
+    return 'POST', '/api/chatbot/save', _json({
+        'name': f'Lead {n}', 'email': f'lead{n}@example.com', 'phone': f'+91 9{n:09d}', 'service': 'SEO Services',
+    })
+
+
+def contact_post(rng, user):
+    n = rng.randrange(1000000)
+    return 'POST', '/contact', _form({
+        'name': f'Visitor {n}', 'email': f'visitor{n}@example.com', 'inquiry_type': 'web',
+        'message': 'We would like a quote for a new website.',
+    })
+
+
+def admin_login(rng, user):
+    return 'POST', '/auth/login', _form({'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+
+
+def admin_page(path):
+    return lambda rng, user: ('GET', path, None)
+
+
+# (name, weight, request builder); builders return (method, path, (body, content type) or None)
+VISITOR_MIX = [
+    ('GET marketing pages', 30, marketing_page),
+    ('POST /api/track/pageview', 30, track_pageview),
+    ('POST /ai-chat', 10, ai_chat),
+    ('POST /api/chatbot/save', 5, chatbot_save),
+    ('POST /contact', 4, contact_post),
+]
+ADMIN_MIX = [
+    ('POST /auth/login', 2, admin_login),
+    ('GET /admin/dashboard', 8, admin_page('/admin/dashboard')),
+    ('GET /admin/analytics', 6, admin_page('/admin/analytics')),
+    ('GET /admin/messages', 3, admin_page('/admin/messages')),
+    ('GET /admin/chatbot', 2, admin_page('/admin/chatbot')),
+]
+
+
+class VirtualUser:
+    """One client with its own cookies; every request opens a fresh connection, like the dev server expects."""
+
+    def __init__(self, host, port, number, seed, mix, admin=False):
+        self.host = host
+        self.port = port
+        self.number = number
+        self.mix = mix
+        self.admin = admin
+        self.rng = random.Random(seed * 1000 + number)
+        self.cookies = SimpleCookie()
+        self.samples = []
+
+    def request(self, method, path, payload=None):
+        headers = {'Accept-Encoding': 'gzip, br', 'User-Agent': 'aura-loadtest'}
+        body = None
+        if payload is not None:
+            body, headers['Content-Type'] = payload
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={m.value}' for k, m in self.cookies.items())
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            for header in response.headers.get_all('Set-Cookie') or ():
+                self.cookies.load(header)
+            return response.status
+        finally:
+            connection.close()
+
+    def run(self, start, deadline):
+        names = [name for name, _, _ in self.mix]
+        weights = [weight for _, weight, _ in self.mix]
+        builders = {name: build for name, _, build in self.mix}
+        if self.admin:
+            self.request(*admin_login(self.rng, self.number))
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            name = self.rng.choices(names, weights)[0]
+            method, path, payload = builders[name](self.rng, self.number)
+            began = time.perf_counter()
+            try:
+                status = self.request(method, path, payload)
+            except (OSError, http.client.HTTPException):
+                status = 0
+            if began >= start:
+                # Requests begun during warm-up are not counted. Pages must
+                # render (a redirect means the admin session was lost);
+                # form posts answer with a redirect
+                ok = status in (200, 304) if method == 'GET' else 0 < status < 400
+                self.samples.append((name, (time.perf_counter() - began) * 1000, ok))
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, seconds):
+    def stats(latencies, errors):
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'throughput': round(len(latencies) / seconds, 1),
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+        }
+
+    by_name = {}
+    for name, ms, ok in samples:
+        entry = by_name.setdefault(name, ([], [0]))
+        entry[0].append(ms)
+        if not ok:
+            entry[1][0] += 1
+    endpoints = {name: stats(latencies, errors[0]) for name, (latencies, errors) in sorted(by_name.items())}
+    total = stats([ms for _, ms, _ in samples], sum(e['errors'] for e in endpoints.values()))
+    return endpoints, total
+
+
+def boot_local(database_url, seed_rows):
+    """Start ``wsgi.application`` on a free port; returns ``(server, database_url)``."""
+    workdir = tempfile.mkdtemp(prefix='aura-loadtest-')
+    database_url = database_url or f'sqlite:///{os.path.join(workdir, "loadtest.db")}'
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SHARED_STATE_DIR'] = os.path.join(workdir, 'state')
+    os.environ['ADMIN_EMAIL'] = ADMIN_EMAIL
+    os.environ['ADMIN_USERNAME'] = 'loadtest'
+    os.environ['ADMIN_PASSWORD'] = ADMIN_PASSWORD
+    os.environ.setdefault('FLASK_ENV', 'production')
+
+    from werkzeug.serving import make_server
+    from wsgi import application
+    from extensions import db
+    from ingest import event_buffer, pageview_buffer
+    from outbox import outbox_sender
+    from seed_admin import ensure_admin_account
+
+    # Queued notification emails stay queued; nothing is sent from a load test
+    outbox_sender.enabled = False
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with application.app_context():
+        ensure_admin_account()
+    client = application.test_client()
+    rng = random.Random(0)
+    for i in range(seed_rows):
+        for builder in (track_pageview, ai_chat) if i % 10 else (track_pageview, chatbot_save, contact_post):
+            method, path, payload = builder(rng, 0)
+            body, content_type = payload
+            client.open(path, method=method, data=body, content_type=content_type)
+    pageview_buffer.flush()
+    event_buffer.flush()
+    with application.app_context():
+        db.session.remove()
+
+    server = make_server('127.0.0.1', 0, application, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='LoadTestServer', daemon=True)
+    thread.start()
+    return server, database_url
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance, min_requests):
+    """Print the change per endpoint; returns the names of endpoints that regressed.
+
+    Endpoints with fewer than ``min_requests`` samples in either run are
+    shown but not judged; their percentiles are too noisy.
+    """
+    regressions = []
+    print(f'\n{"compared with baseline":<28} {"p95 ms":>18} {"req/s":>18}')
+    for name, now in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            print(f'{name:<28} {"(new)":>18}')
+            continue
+        # Sub-millisecond p95 changes are noise, not regressions
+        slower = now['p95_ms'] > before['p95_ms'] * (1 + tolerance) and now['p95_ms'] - before['p95_ms'] > 1
+        fewer = now['throughput'] < before['throughput'] * (1 - tolerance)
+        failing = now['errors'] and not before['errors']
+        if min(now['requests'], before['requests']) < min_requests:
+            flag = '  (too few requests)'
+        else:
+            flag = '  REGRESSION' if slower or fewer or failing else ''
+        print(f'{name:<28} {before["p95_ms"]:>8.1f} -> {now["p95_ms"]:>6.1f} '
+              f'{before["throughput"]:>8.1f} -> {now["throughput"]:>6.1f}{flag}')
+        if flag == '  REGRESSION':
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='test a running server instead of booting one')
+    parser.add_argument('--database-url', help='scratch database for the local server (default: a new SQLite file)')
+    parser.add_argument('--concurrency', type=int, default=8, help='anonymous visitors')
+    parser.add_argument('--admins', type=int, default=2, help='logged-in admins, besides the visitors')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--seed-rows', type=int, default=200, help='tracking hits, chats and leads to seed first')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='fail when results regress against this baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95/throughput change (default 0.25)')
+    parser.add_argument('--min-requests', type=int, default=50, help='samples an endpoint needs to be judged')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port, database = target.hostname, target.port or 80, None
+    else:
+        server, database = boot_local(args.database_url, args.seed_rows)
+        host, port = '127.0.0.1', server.server_port
+
+    start = time.perf_counter() + args.warmup
+    deadline = start + args.duration
+    users = [VirtualUser(host, port, n, args.seed, VISITOR_MIX) for n in range(args.concurrency)]
+    users += [VirtualUser(host, port, args.concurrency + n, args.seed, ADMIN_MIX, admin=True)
+              for n in range(args.admins)]
+    threads = [threading.Thread(target=u.run, args=(start, deadline)) for u in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if server is not None:
+        server.shutdown()
+
+    endpoints, total = summarize([s for u in users for s in u.samples], args.duration)
+    print(f'{"endpoint":<28} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for name, row in list(endpoints.items()) + [('total', total)]:
+        print(f'{name:<28} {row["throughput"]:>8.1f} {row["p50_ms"]:>8.1f} {row["p95_ms"]:>8.1f} '
+              f'{row["p99_ms"]:>8.1f} {row["errors"]:>7}')
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'target': args.url or 'local werkzeug server',
+            'database': database.split(':', 1)[0] if database else None,
+            'concurrency': args.concurrency,
+            'admins': args.admins,
+            'duration': args.duration,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+        },
+        'endpoints': endpoints,
+        'total': total,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nBaseline written to {args.save}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_requests)
+        if regressions:
+            print(f'\n{len(regressions)} endpoint(s) regressed by more than {args.tolerance:.0%}')
+            sys.exit(1)
+        print('\nNo regressions')
+
+
+if __name__ == '__main__':
+    main()
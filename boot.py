@@ -0,0 +1,99 @@
+# boot.py
+"""Startup helpers: per-phase boot timings and the create_all shortcut.
+
+``create_app`` marks the end of each phase on a ``BootTimer``; the
+timings end up in ``app.extensions['boot_timings']`` and are printed by
+``flask boot-report``, which can fail CI when boot exceeds a budget.
+
+``schema_is_current`` lets production boots skip ``db.create_all()`` (one
+round of schema introspection per table) when the database is already
+stamped with the newest migration. A database that ``create_all`` built
+from scratch is stamped with ``stamp_head``, so Alembic knows its schema
+and later boots take the shortcut.
+"""
+import os
+import re
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+_REVISION = re.compile(r'^revision\s*=\s*[\'"]([^\'"]+)[\'"]', re.MULTILINE)
+_DOWN_REVISION = re.compile(r'^down_revision\s*=\s*(.+)$', re.MULTILINE)
+
+
+class BootTimer:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        """Record the time since the previous mark as ``phase``."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    def replace(self, phase, ms):
+        """Overwrite the duration of ``phase``, e.g. when it was measured separately."""
+        self.phases = [(name, ms if name == phase else value) for name, value in self.phases]
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, ms in self.phases)
+
+
+def migration_head(versions_dir):
+    """The single head revision of the migration scripts, or None.
+
+    Reads the revision identifiers straight from the files, which is much
+    cheaper than loading them through Alembic.
+    """
+    revisions, parents = set(), set()
+    try:
+        filenames = os.listdir(versions_dir)
+    except FileNotFoundError:
+        return None
+    for filename in filenames:
+        if not filename.endswith('.py'):
+            continue
+        with open(os.path.join(versions_dir, filename)) as f:
+            source = f.read()
+        revision = _REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down:
+            parents.update(re.findall(r'[\'"]([^\'"]+)[\'"]', down.group(1)))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def schema_is_current(db, versions_dir):
+    """True if the database is stamped with the newest migration."""
+    head = migration_head(versions_dir)
+    if head is None:
+        return False
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(text('SELECT version_num FROM alembic_version')).scalar() == head
+    except SQLAlchemyError:
+        return False
+
+
+def database_is_empty(db):
+    return not inspect(db.engine).get_table_names()
+
+
+def stamp_head(db, versions_dir):
+    """Record the newest migration as applied, like ``flask db stamp head``."""
+    head = migration_head(versions_dir)
+    if head is None:
+        return
+    with db.engine.begin() as connection:
+        connection.execute(text('CREATE TABLE IF NOT EXISTS alembic_version ('
+                                'version_num VARCHAR(32) NOT NULL, '
+                                'CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num))'))
+        connection.execute(text('DELETE FROM alembic_version'))
+        connection.execute(text('INSERT INTO alembic_version (version_num) VALUES (:head)'), {'head': head})
@@ -0,0 +1,193 @@
+# cli.py
+"""Flask CLI commands, e.g. ``flask --app wsgi analytics rollup``."""
+import click
+from flask.cli import AppGroup
+
+analytics_cli = AppGroup('analytics', help='Analytics maintenance commands.')
+outbox_cli = AppGroup('outbox', help='Email outbox commands.')
+intents_cli = AppGroup('intents', help='Chatbot intent commands.')
+assets_cli = AppGroup('assets', help='Static asset commands.')
+
+
+@analytics_cli.command('rollup')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Only rebuild days from this UTC date onward (default: everything).')
+def rollup_command(since):
+    """Backfill or catch up the page-view rollup tables (days before today, UTC)."""
+    from ingest import pageview_buffer
+    from rollups import rebuild_rollups
+
+    pageview_buffer.flush()
+    pageviews, sessions = rebuild_rollups(since.date() if since else None)
+    click.echo(f'Rolled up {pageviews} page views and {sessions} sessions.')
+
+
+@analytics_cli.command('archive')
+@click.option('--older-than-days', type=click.IntRange(min=1), default=None,
+              help='Archive rows from before UTC midnight this many days ago (default: ANALYTICS_RETENTION_DAYS).')
+@click.option('--archive-dir', type=click.Path(file_okay=False), default=None,
+              help='Directory for the monthly .ndjson.gz files (default: ANALYTICS_ARCHIVE_DIR).')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None,
+              help='Rows archived and deleted per transaction.')
+def archive_command(older_than_days, archive_dir, batch_size):
+    """Move old page views and visitor sessions into monthly archive files."""
+    from flask import current_app
+    from archive import archive_analytics
+
+    config = current_app.config
+    archived = archive_analytics(
+        older_than_days or config['ANALYTICS_RETENTION_DAYS'],
+        archive_dir or config['ANALYTICS_ARCHIVE_DIR'],
+        batch_size or config['ANALYTICS_ARCHIVE_BATCH_SIZE'],
+    )
+    for table_name, count in archived.items():
+        click.echo(f'Archived {count} rows from {table_name}.')
+
+
+@analytics_cli.command('restore')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+def restore_command(paths):
+    """Load archive files (e.g. page_views-2025-01.ndjson.gz) back into the database."""
+    from archive import restore_archive
+
+    for path in paths:
+        try:
+            count = restore_archive(path)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        click.echo(f'Restored {count} rows from {path}.')
+
+
+@outbox_cli.command('send')
+def outbox_send_command():
+    """Deliver every due outbox email now."""
+    from outbox import outbox_sender
+
+    sent, failed = outbox_sender.send_pending()
+    click.echo(f'Sent {sent} emails, {failed} failed or rescheduled.')
+
+
+@intents_cli.command('seed')
+@click.option('--replace', is_flag=True, help='Delete the stored intents first.')
+def intents_seed_command(replace):
+    """Store the built-in /ai-chat intents in the database."""
+    from intents import seed_default_intents
+
+    count = seed_default_intents(replace=replace)
+    if count:
+        click.echo(f'Stored {count} intents.')
+    else:
+        click.echo('Intents already exist; use --replace to overwrite them.')
+
+
+@intents_cli.command('list')
+def intents_list_command():
+    """Show the compiled intents in match order."""
+    from intents import get_matcher
+
+    matcher = get_matcher()
+    for name, response in zip(matcher.names, matcher.responses):
+        click.echo(f'{name}: {response}')
+    click.echo(f'(fallback): {matcher.fallback}')
+
+
+@assets_cli.command('build')
+def assets_build_command():
+    """Write fingerprinted, minified and precompressed assets to static/dist."""
+    from flask import current_app
+    from assets import assets, brotli, build_assets, rjsmin
+
+    manifest = build_assets(current_app.static_folder)
+    assets.load_manifest()
+    click.echo(f'Built {len(manifest)} assets.')
+    if brotli is None:
+        click.echo('brotli is not installed; only .gz variants were written.')
+    if rjsmin is None:
+        click.echo('rjsmin is not installed; JavaScript was not minified.')
+
+
+@click.command('seed-admin')
+def seed_admin_command():
+    """Create the admin account from ADMIN_* env vars unless one exists."""
+    from seed_admin import ensure_admin_account
+
+    admin, created = ensure_admin_account()
+    click.echo(f'{"Created" if created else "Found"} admin account {admin.email}.')
+
+
+@click.command('release')
+@click.pass_context
+def release_command(ctx):
+    """Deploy-time steps in a single boot: migrate, build assets, seed the admin."""
+    from flask_migrate import upgrade
+
+    # Before gunicorn starts: create_all doesn't add columns or indexes to existing tables
+    upgrade()
+    ctx.invoke(assets_build_command)
+    ctx.invoke(seed_admin_command)
+
+
+@click.command('boot-report')
+@click.option('--budget-ms', type=float, default=None, help='Fail if the total boot time exceeds this.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+def boot_report_command(budget_ms, as_json):
+    """Show how long each create_app phase took."""
+    import json
+    import time
+    from flask import current_app
+    from page_cache import page_cache
+
+    boot = current_app.extensions['boot_timings']
+    # CLI boots skip the page-cache warm-up, so time it here
+    if current_app.config['PAGE_CACHE_WARM']:
+        started = time.perf_counter()
+        page_cache.warm()
+        boot.replace('warm', (time.perf_counter() - started) * 1000)
+
+    if as_json:
+        click.echo(json.dumps({'phases': dict(boot.phases), 'total_ms': boot.total_ms, 'budget_ms': budget_ms}))
+    else:
+        for phase, ms in boot.phases:
+            click.echo(f'{phase:<12} {ms:9.1f} ms')
+        click.echo(f'{"total":<12} {boot.total_ms:9.1f} ms')
+    if budget_ms is not None and boot.total_ms > budget_ms:
+        raise SystemExit(f'Boot took {boot.total_ms:.0f} ms, over the {budget_ms:.0f} ms budget.')
+
+
+@click.command('check-query-plans')
+@click.option('--app-db', is_flag=True,
+              help="Explain against the app's own SQLite database instead of a schema built from the models.")
+@click.option('--verbose', '-v', is_flag=True, help='Print every plan, not just regressions.')
+def check_query_plans_command(app_db, verbose):
+    """Fail if a hot admin/API query falls back to a full table scan."""
+    from extensions import db
+    from query_plans import check_query_plans
+
+    if app_db and db.engine.dialect.name != 'sqlite':
+        raise click.UsageError('--app-db needs a SQLite database.')
+
+    failures = 0
+    for name, plan, scans in check_query_plans(db.engine if app_db else None):
+        if scans:
+            failures += 1
+            click.echo(f'FAIL {name}: full scan of {", ".join(scans)}')
+        elif verbose:
+            click.echo(f'ok   {name}')
+        if scans or verbose:
+            for line in plan:
+                click.echo(f'       {line}')
+
+    if failures:
+        raise SystemExit(f'{failures} queries regressed to a full table scan.')
+    click.echo('All hot queries use an index.')
+
+
+def register_commands(app):
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(seed_admin_command)
+    app.cli.add_command(release_command)
+    app.cli.add_command(boot_report_command)
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(intents_cli)
+    app.cli.add_command(assets_cli)
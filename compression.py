@@ -0,0 +1,222 @@
+# compression.py
+"""gzip/brotli response compression as WSGI middleware.
+
+Responses of an allow-listed content type are compressed for clients that
+accept it. Brotli is preferred when the ``brotli`` package is installed.
+Buffered responses shorter than ``COMPRESSION_MIN_SIZE`` are left alone.
+Streamed responses (no ``Content-Length``: exports, Server-Sent Events)
+are compressed chunk by chunk with a sync flush after each one, so nothing
+is held back waiting for more output.
+
+A compressed response gets its ETag suffixed with the encoding
+(``"abc-gzip"``), and the suffix is stripped from ``If-None-Match`` again
+before the app sees it, so conditional requests keep working. Compressed
+bodies of shared responses (an ETag and ``Cache-Control: public``, as the
+cached marketing pages send) are kept in a small LRU keyed by path, ETag
+and encoding, so a repeat request costs no compression work. Private
+responses such as ``/api/notifications`` reuse ETags for bodies that
+depend on the request, so they are always compressed afresh.
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from itertools import chain
+
+from werkzeug.datastructures import Headers, ResponseCacheControl
+from werkzeug.http import parse_accept_header, parse_cache_control_header
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript', 'text/event-stream',
+    'application/json', 'application/javascript', 'application/xml', 'application/x-ndjson', 'image/svg+xml',
+)
+
+_ETAG_SUFFIX = re.compile(r'-(?:gzip|br)"')
+
+
+class _GzipStream:
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, flush=False):
+        out = self._compressor.process(data)
+        return out + self._compressor.flush() if flush else out
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+
+    def __init__(self, wsgi_app, level=6, brotli_quality=5, min_size=500, mimetypes=DEFAULT_MIMETYPES,
+                 cache_entries=256):
+        self.wsgi_app = wsgi_app
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            environ['HTTP_IF_NONE_MATCH'] = _ETAG_SUFFIX.sub('"', if_none_match)
+
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        app_iter = self.wsgi_app(environ, capture)
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        body = chain(written, app_iter) if written else app_iter
+
+        if status.startswith('304') and if_none_match and 'ETag' in headers:
+            # Confirm the validator of the compressed copy the client holds
+            encoding = self._negotiate(environ)
+            if encoding and f'-{encoding}"' in if_none_match:
+                headers['ETag'] = headers['ETag'][:-1] + f'-{encoding}"'
+
+        if not self._compressible(status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        headers.update(Vary=_add_vary(headers.get('Vary')))
+        encoding = self._negotiate(environ)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        length = headers.get('Content-Length', type=int)
+        if length is not None and length < self.min_size:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        etag = headers.get('ETag')
+        headers['Content-Encoding'] = encoding
+        if etag:
+            headers['ETag'] = etag[:-1] + f'-{encoding}"'
+        cache_key = (environ.get('PATH_INFO', ''), etag, encoding) if etag and _shared(headers) else None
+
+        if length is None:
+            # Streamed: compress as the app produces output
+            headers.remove('Content-Length')
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return self._stream(body, app_iter, encoding)
+
+        compressed = self._cached(cache_key) if cache_key else None
+        if compressed is None:
+            try:
+                data = b''.join(body)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            stream = self._compressor(encoding)
+            compressed = stream.compress(data) + stream.finish()
+            if cache_key:
+                self._store(cache_key, compressed)
+        elif hasattr(app_iter, 'close'):
+            app_iter.close()
+        headers['Content-Length'] = str(len(compressed))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [compressed]
+
+    def _compressible(self, status, headers):
+        if not status.startswith('200') or 'Content-Encoding' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        mimetype = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        return mimetype in self.mimetypes
+
+    def _negotiate(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compressor(self, encoding):
+        return _BrotliStream(self.brotli_quality) if encoding == 'br' else _GzipStream(self.level)
+
+    def _stream(self, body, app_iter, encoding):
+        stream = self._compressor(encoding)
+        try:
+            for chunk in body:
+                if chunk:
+                    out = stream.compress(chunk, flush=True)
+                    if out:
+                        yield out
+            yield stream.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def _cached(self, key):
+        with self._lock:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+            return compressed
+
+    def _store(self, key, compressed):
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+
+def _shared(headers):
+    """True if the response is the same for everyone who gets this ETag."""
+    cache_control = parse_cache_control_header(headers.get('Cache-Control'), cls=ResponseCacheControl)
+    return cache_control.public and not (cache_control.private or cache_control.no_store)
+
+
+def _add_vary(vary):
+    values = [v.strip() for v in (vary or '').split(',') if v.strip()]
+    if 'accept-encoding' not in (v.lower() for v in values):
+        values.append('Accept-Encoding')
+    return ', '.join(values)
+
+
+def init_compression(app):
+    app.config.setdefault('COMPRESSION_ENABLED', True)
+    app.config.setdefault('COMPRESSION_LEVEL', 6)
+    app.config.setdefault('COMPRESSION_BROTLI_QUALITY', 5)
+    app.config.setdefault('COMPRESSION_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESSION_MIMETYPES', DEFAULT_MIMETYPES)
+    app.config.setdefault('COMPRESSION_CACHE_ENTRIES', 256)
+    if app.config['COMPRESSION_ENABLED']:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            level=app.config['COMPRESSION_LEVEL'],
+            brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+            min_size=app.config['COMPRESSION_MIN_SIZE'],
+            mimetypes=app.config['COMPRESSION_MIMETYPES'],
+            cache_entries=app.config['COMPRESSION_CACHE_ENTRIES'],
+        )
@@ -0,0 +1,53 @@
+# db_helpers.py
+"""Portable bulk-write helpers shared by the ingestion and rollup code."""
+from extensions import db
+
+
+def upsert(model, rows, index_elements, increment=(), replace=()):
+    """Insert ``rows`` or fold them into existing rows matching ``index_elements``.
+
+    Columns named in ``increment`` are added to the stored value and columns in
+    ``replace`` overwrite it. Uses ``ON CONFLICT`` on SQLite and PostgreSQL and
+    falls back to select-then-write on other databases.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        updates = {col: table.c[col] + stmt.excluded[col] for col in increment}
+        updates.update({col: stmt.excluded[col] for col in replace})
+        stmt = stmt.on_conflict_do_update(index_elements=list(index_elements), set_=updates)
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        match = [table.c[col] == row[col] for col in index_elements]
+        values = {col: table.c[col] + row[col] for col in increment}
+        values.update({col: row[col] for col in replace})
+        result = db.session.execute(table.update().where(*match).values(**values))
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(**row))
+
+
+def upsert_ignore(model, rows, index_elements):
+    """Insert ``rows``, skipping any that collide on ``index_elements``."""
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        for row in rows:
+            match = [table.c[col] == row[col] for col in index_elements]
+            if db.session.execute(db.select(table.c[index_elements[0]]).where(*match)).first() is None:
+                db.session.execute(table.insert().values(**row))
+        return
+    db.session.execute(insert(table).on_conflict_do_nothing(index_elements=list(index_elements)), rows)
@@ -0,0 +1,88 @@
+# db_pool.py
+"""Connection pool with checkout and wait statistics.
+
+``InstrumentedQueuePool`` is a drop-in ``QueuePool`` that counts
+checkouts and times the ones that found no idle connection, which either
+opened a new (overflow) connection or waited for one to be returned.
+``pool_status`` reports those numbers with the pool's current occupancy;
+``/api/health`` includes it so saturation (waits creeping up, checkout
+timeouts) is visible before requests start timing out. The numbers are
+those of the worker that answered.
+"""
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+    def record(self, elapsed, checked_out, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if waited:
+                self.waits += 1
+                self.wait_time += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_ms_total': round(self.wait_time * 1000, 1),
+                'wait_ms_max': round(self.max_wait * 1000, 1),
+                'peak_checked_out': self.peak_checked_out,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Per pool, so a worker's dispose() after fork starts from zero
+        self.stats = PoolStats()
+
+    def connect(self):
+        waited = self.checkedin() == 0
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, self.checkedout(), waited, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start, self.checkedout(), waited)
+        return connection
+
+
+def pool_status(engine):
+    """Occupancy of ``engine``'s pool, plus checkout statistics when it is instrumented."""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.stats.as_dict())
+    return status
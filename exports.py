@@ -0,0 +1,74 @@
+# exports.py
+"""Streaming CSV/NDJSON exports for the admin panel.
+
+Rows are read with ``yield_per`` (a server-side cursor on PostgreSQL) and
+encoded one batch at a time into a generator, so an export of any size
+holds only one batch in memory.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from flask import Response, stream_with_context
+
+from extensions import db
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_BATCH_SIZE = 500
+
+# Spreadsheet apps treat cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_batches(statement, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of result rows for ``statement`` without loading the whole result."""
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+
+def encode(records, fields, fmt):
+    """Yield the encoded export for ``records``, an iterable of lists of dicts."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(fields)
+    for batch in records:
+        for record in batch:
+            if fmt == 'csv':
+                writer.writerow([_csv_cell(record.get(field)) for field in fields])
+            else:
+                buffer.write(json.dumps({field: _plain(record.get(field)) for field in fields}, ensure_ascii=False))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(records, fields, fmt, filename):
+    """A streamed download of ``records`` as ``filename.<fmt>``."""
+    return Response(
+        stream_with_context(encode(records, fields, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'},
+    )
@@ -17,7 +17,11 @@ def init_extensions(app):
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
     
+    # Identity cache for user_loader; importing it registers the
+    # session events that invalidate cached users after commits
+    import identity
+    
     @login_manager.user_loader
     def load_user(user_id):
-        from models import User
-        return User.query.get(int(user_id))
+        from identity import load_user_snapshot
+        return load_user_snapshot(int(user_id))
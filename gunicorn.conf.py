@@ -0,0 +1,53 @@
+# gunicorn.conf.py
+# Production server settings: `gunicorn -c gunicorn.conf.py wsgi:application`
+import os
+
+from runtime_config import server_plan
+from shared_state import hold_process_threads
+
+# Workers, threads and timeouts sized with the database connection budget
+# (see runtime_config.py); the app sizes its pools from the same plan
+plan = server_plan()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = plan.workers
+threads = plan.threads
+worker_class = plan.worker_class
+timeout = plan.timeout
+keepalive = 5
+
+# Build the app once in the master; workers fork from the warm parent
+# (models, templates and the page cache are already loaded)
+preload_app = True
+
+# The master only forks; background threads (ingest, outbox, realtime,
+# checkpoints) start in the workers
+hold_process_threads()
+
+
+def when_ready(server):
+    # Close the connections the master opened while booting
+    from wsgi import application
+    from extensions import db
+    with application.app_context():
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    hold_process_threads(False)
+    # Connections opened while booting the parent must not be shared
+    from wsgi import application
+    from extensions import db
+    with application.app_context():
+        db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Write out whatever the worker still has buffered
+    from ingest import event_buffer, pageview_buffer
+    from metrics import metrics_store
+    from realtime import visitors
+    pageview_buffer.shutdown()
+    event_buffer.shutdown()
+    visitors.persist()
+    metrics_store.persist()
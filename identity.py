@@ -0,0 +1,109 @@
+# identity.py
+"""Identity cache for the Flask-Login ``user_loader``.
+
+Authenticated requests get ``current_user`` from a per-process cache of
+detached, read-only ``UserSnapshot`` objects instead of querying ``users``.
+An entry expires after ``USER_CACHE_TTL`` seconds or as soon as the user's
+version stamp is bumped, which happens after any commit that updates or
+deletes that user (profile edits, password changes, ``is_active`` changes,
+logins).
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import User
+from shared_state import VersionStamp
+
+USER_CACHE_TTL = 300
+
+_SNAPSHOT_FIELDS = ('id', 'username', 'email', 'password_hash', 'created_at',
+                    'last_login', 'is_admin', 'is_active')
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class UserSnapshot:
+    """Read-only copy of a ``User`` row that is safe to share across requests.
+
+    Provides the Flask-Login user interface and the read side of ``User``.
+    Load the ``User`` row to change anything.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user):
+        object.__setattr__(self, '_data', {field: getattr(user, field) for field in _SNAPSHOT_FIELDS})
+
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'UserSnapshot is read-only; load the User row to change {name!r}')
+
+    def get_id(self):
+        return str(self._data['id'])
+
+    def check_password(self, password):
+        return User.check_password(self, password)
+
+    def __eq__(self, other):
+        return isinstance(other, (UserSnapshot, User)) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self._data['id'])
+
+    def __repr__(self):
+        return f'<UserSnapshot {self._data["username"]}>'
+
+
+def _stamp(user_id):
+    return VersionStamp(f'user-{user_id}')
+
+
+def load_user_snapshot(user_id):
+    """Return a cached ``UserSnapshot`` for ``user_id``, or None if there is no such user."""
+    version = _stamp(user_id).current()
+    entry = _cache.get(user_id)
+    if entry is not None and entry[1] > time.monotonic() and entry[2] == version:
+        return entry[0]
+
+    user = db.session.get(User, user_id)
+    snapshot = UserSnapshot(user) if user is not None else None
+    with _lock:
+        _cache[user_id] = (snapshot, time.monotonic() + USER_CACHE_TTL, version)
+    return snapshot
+
+
+def invalidate_user(user_id):
+    """Drop ``user_id`` from this worker's cache and bump its stamp for the others."""
+    with _lock:
+        _cache.pop(user_id, None)
+    _stamp(user_id).bump()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
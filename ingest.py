@@ -0,0 +1,273 @@
+# ingest.py
+"""Buffered, batched write path for analytics tracking.
+
+Tracking endpoints hand records to an in-process buffer instead of opening a
+transaction per hit. A background thread flushes the buffer whenever it holds
+``batch_size`` records or ``flush_interval`` seconds have passed, and the
+remaining records are flushed when the worker shuts down.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+from db_helpers import upsert, upsert_ignore
+from extensions import db
+from models import AnalyticsEvent, EventType, PageView, VisitorSession
+from rollups import record_pageviews
+from shared_state import ProcessThread
+
+# Event payloads larger than this are replaced by a marker instead of stored
+EVENT_PAYLOAD_MAX_LENGTH = 2048
+
+
+class InvalidRecord(ValueError):
+    """A tracker payload that can't be stored; the endpoints answer 400."""
+
+
+class IngestBuffer:
+    """Bounded in-process queue that writes records to the database in batches.
+
+    Subclasses implement ``write_batch``; it runs inside an app context and
+    should only add work to ``db.session``, the buffer commits it.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.batch_size = 200
+        self.flush_interval = 2.0
+        self.put_timeout = 1.0
+        self._queue = None
+        self._worker = ProcessThread(self._run, type(self).__name__)
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('INGEST_BUFFER_ENABLED', os.getenv('INGEST_BUFFER_ENABLED', 'true').lower() != 'false')
+        app.config.setdefault('INGEST_BUFFER_MAX_SIZE', 10000)
+        app.config.setdefault('INGEST_BATCH_SIZE', 200)
+        app.config.setdefault('INGEST_FLUSH_INTERVAL', 2.0)
+
+        self.app = app
+        self.enabled = app.config['INGEST_BUFFER_ENABLED'] and not app.config.get('TESTING')
+        self.batch_size = app.config['INGEST_BATCH_SIZE']
+        self.flush_interval = app.config['INGEST_FLUSH_INTERVAL']
+        self._queue = queue.Queue(maxsize=app.config['INGEST_BUFFER_MAX_SIZE'])
+        atexit.register(self.shutdown)
+
+    def write_batch(self, records):
+        raise NotImplementedError
+
+    def submit(self, record):
+        """Queue a record, writing it inline when buffering is disabled."""
+        if not self.enabled:
+            self._write([record])
+            return
+
+        self._worker.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Backpressure: the request that finds the buffer full pays for a flush
+            self.flush()
+            self._queue.put(record, timeout=self.put_timeout)
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def flush(self):
+        """Write everything currently queued. Returns the number of records written."""
+        if self._queue is None:
+            return 0
+        with self._flush_lock:
+            written = 0
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    return written
+                self._write(batch)
+                written += len(batch)
+
+    def shutdown(self):
+        self._worker.stop()
+        self._wake.set()
+        self.flush()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def rolled_back(self):
+        """Called after a failed batch; drop anything cached from its transaction."""
+
+    def _write(self, batch):
+        # A fresh app context gives the flush its own session, so a flush
+        # triggered from inside a request never commits the request's work.
+        with self.app.app_context():
+            try:
+                self.write_batch(batch)
+                db.session.commit()
+                return
+            except Exception:
+                db.session.rollback()
+                self.rolled_back()
+                if len(batch) == 1:
+                    self.app.logger.exception('%s: dropped record', type(self).__name__)
+                    return
+                self.app.logger.warning('%s: batch of %d records failed, retrying one by one',
+                                        type(self).__name__, len(batch), exc_info=True)
+            # One bad record must not cost everyone else's
+            for record in batch:
+                try:
+                    self.write_batch([record])
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self.rolled_back()
+                    self.app.logger.exception('%s: dropped record', type(self).__name__)
+
+    def _run(self):
+        while self._worker.running():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def existing_sessions_statement(session_ids):
+    """The ``session_id`` of every ``VisitorSession`` among ``session_ids``."""
+    return db.select(VisitorSession.session_id).where(VisitorSession.session_id.in_(session_ids))
+
+
+class PageViewBuffer(IngestBuffer):
+    """Buffers ``PageView`` rows and folds repeated hits into one session update."""
+
+    def write_batch(self, records):
+        sessions = {}
+        for record in records:
+            session = sessions.get(record['session_id'])
+            if session is None:
+                sessions[record['session_id']] = {
+                    'session_id': record['session_id'],
+                    'ip_address': record['ip_address'],
+                    'user_agent': record['user_agent'],
+                    'start_time': record['created_at'],
+                    'last_activity': record['created_at'],
+                    'page_views_count': 1,
+                    'duration_seconds': 0,
+                    'is_bounce': False,
+                }
+            else:
+                session['page_views_count'] += 1
+                session['last_activity'] = max(session['last_activity'], record['created_at'])
+
+        existing = {
+            session_id for (session_id,) in
+            db.session.execute(existing_sessions_statement(list(sessions)))
+        }
+        upsert(VisitorSession, list(sessions.values()), ['session_id'],
+               increment=['page_views_count'], replace=['last_activity'])
+        db.session.execute(db.insert(PageView), records)
+        record_pageviews(records, [session['start_time'] for session_id, session in sessions.items()
+                                   if session_id not in existing])
+
+
+class EventBuffer(IngestBuffer):
+    """Buffers tracker events into the append-only ``analytics_events`` table."""
+
+    def __init__(self):
+        super().__init__()
+        self._type_ids = {}
+
+    def write_batch(self, records):
+        type_ids = self.type_ids({record['event_type'] for record in records})
+        rows = [{
+            'event_type_id': type_ids[record['event_type']],
+            'page_url': record['page_url'],
+            'session_id': record['session_id'],
+            'payload': record['payload'],
+            'created_at': record['created_at'],
+        } for record in records]
+        db.session.execute(db.insert(AnalyticsEvent), rows)
+
+    def type_ids(self, names):
+        """Map event names to their interned ``EventType`` ids, creating missing ones."""
+        missing = [name for name in names if name not in self._type_ids]
+        if missing:
+            upsert_ignore(EventType, [{'name': name} for name in missing], ['name'])
+            for event_type in EventType.query.filter(EventType.name.in_(missing)).all():
+                self._type_ids[event_type.name] = event_type.id
+        return {name: self._type_ids[name] for name in names}
+
+    def rolled_back(self):
+        # Ids read inside the failed transaction may belong to rows that were never committed
+        self._type_ids = {}
+
+
+pageview_buffer = PageViewBuffer()
+event_buffer = EventBuffer()
+
+
+def _text(value, max_length):
+    """``value`` as a string cut to the column length, or None if empty."""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    return str(value)[:max_length] or None
+
+
+def pageview_record(data, ip_address):
+    """Build a ``PageView`` row from a tracker payload.
+
+    Raises ``InvalidRecord`` without a page URL or session id. Other fields
+    are cut to their column lengths, so the record can't fail the batch
+    insert later.
+    """
+    if not isinstance(data, dict):
+        raise InvalidRecord('Expected a JSON object')
+    page_url = _text(data.get('page_url'), 500)
+    session_id = _text(data.get('session_id'), 100)
+    if page_url is None or session_id is None:
+        raise InvalidRecord('page_url and session_id are required')
+    return {
+        'page_url': page_url,
+        'page_title': _text(data.get('page_title'), 200),
+        'ip_address': _text(ip_address, 45),
+        'user_agent': _text(data.get('user_agent'), 2000),
+        'referrer': _text(data.get('referrer'), 500),
+        'session_id': session_id,
+        'created_at': datetime.now(timezone.utc),
+    }
+
+
+def event_record(data):
+    """Build an ``AnalyticsEvent`` row from a tracker payload."""
+    event_type = _text(data.get('event_type'), 50) if isinstance(data, dict) else None
+    if event_type is None:
+        raise InvalidRecord('event_type is required')
+    payload = data.get('data')
+    if payload is not None:
+        payload = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+        if len(payload) > EVENT_PAYLOAD_MAX_LENGTH:
+            payload = '{"truncated":true}'
+    return {
+        'event_type': event_type,
+        'page_url': _text(data.get('page_url'), 500),
+        'session_id': _text(data.get('session_id'), 100),
+        'payload': payload,
+        'created_at': datetime.now(timezone.utc),
+    }
+
+
+def init_ingest(app):
+    pageview_buffer.init_app(app)
+    event_buffer.init_app(app)
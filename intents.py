@@ -0,0 +1,190 @@
+# intents.py
+"""Keyword intent matching for the /ai-chat endpoint.
+
+Intents and their keywords live in ``chat_intents`` and
+``chat_intent_keywords``. All keywords are compiled into one regex shaped
+as a trie (``h(?:ello|i)``...) that finds the longest keyword at each
+match position; searching resumes one character after every match so
+overlapping keywords are found too. A message is scanned once, and each
+position only branches on its next character, so the cost barely grows
+with the number of intents. Every keyword knows the
+best rank among itself and the keywords that are its prefixes, and the
+lowest rank seen over the whole message wins. That keeps the original
+semantics: a keyword matches anywhere in the message as a substring, and
+earlier intents win.
+
+The compiled matcher is cached per worker and rebuilt only when the
+``intents`` version stamp is bumped, which happens on every commit that
+touches the intent tables. Replies to short messages are LRU-cached on the
+matcher, so a recompile also drops them.
+"""
+import re
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from models import ChatIntent, ChatIntentKeyword
+from shared_state import CachedValue, VersionStamp
+
+# Replies used until `flask intents seed` fills the tables; earlier entries win
+DEFAULT_INTENTS = [
+    ('hi', 10, ['hi'], 'Hello! How can I help you today?'),
+    ('hello', 20, ['hello'], 'Hi there! Welcome to Aura. How can we assist you?'),
+    ('services', 30, ['services'], 'We offer web development, software development, and digital marketing services. Which interests you?'),
+    ('price', 40, ['price'], 'Please contact us for customized pricing based on your requirements.'),
+]
+
+# The intent without keywords whose reply is used when nothing matches
+FALLBACK_INTENT = 'default'
+DEFAULT_FALLBACK = 'Thank you for your message! Our team will get back to you shortly. For urgent inquiries, please email vs8890864@gmail.com'
+
+# Replies to messages up to this length are cached
+RESPONSE_CACHE_MAX_LENGTH = 200
+RESPONSE_CACHE_SIZE = 1024
+
+_stamp = VersionStamp('intents')
+
+
+def _trie_pattern(node):
+    """Regex for a keyword trie; greedy, so it prefers the longest keyword."""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:%s)' % '|'.join(branches)
+    return '(?:%s)?' % body if '' in node else body
+
+
+class IntentMatcher:
+    """Intents compiled into one regex; ``intents`` is ``(name, keywords, response)`` in priority order."""
+
+    def __init__(self, intents, fallback):
+        self.fallback = fallback
+        self.names = []
+        self.responses = []
+        # keyword -> rank of the first intent that lists it
+        ranks = {}
+        for rank, (name, keywords, response) in enumerate(intents):
+            self.names.append(name)
+            self.responses.append(response)
+            for keyword in keywords:
+                if keyword:
+                    ranks.setdefault(keyword.lower(), rank)
+
+        trie = {}
+        for keyword in ranks:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+        # A keyword also stands for every shorter keyword it starts with
+        self._best_rank = {
+            keyword: min(ranks[keyword[:i]] for i in range(1, len(keyword) + 1) if keyword[:i] in ranks)
+            for keyword in ranks
+        }
+        self.pattern = re.compile(_trie_pattern(trie), re.DOTALL) if ranks else None
+        self.respond = lru_cache(maxsize=RESPONSE_CACHE_SIZE)(self._respond)
+
+    @classmethod
+    def from_defaults(cls):
+        return cls([(name, keywords, response) for name, _, keywords, response in DEFAULT_INTENTS], DEFAULT_FALLBACK)
+
+    def match(self, message):
+        """Return the rank of the best intent found in ``message``, or None."""
+        if self.pattern is None:
+            return None
+        text = message.lower()
+        search = self.pattern.search
+        best = None
+        m = search(text)
+        while m is not None:
+            rank = self._best_rank[m.group()]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+            # Resume one character on so overlapping keywords are seen too
+            m = search(text, m.start() + 1)
+        return best
+
+    def intent_name(self, message):
+        rank = self.match(message)
+        return self.names[rank] if rank is not None else None
+
+    def reply(self, message):
+        if len(message) <= RESPONSE_CACHE_MAX_LENGTH:
+            return self.respond(message)
+        return self._respond(message)
+
+    def _respond(self, message):
+        rank = self.match(message)
+        return self.responses[rank] if rank is not None else self.fallback
+
+
+def _load_matcher():
+    intents = ChatIntent.query.filter(ChatIntent.is_active.isnot(False)) \
+        .options(selectinload(ChatIntent.keywords)) \
+        .order_by(ChatIntent.priority, ChatIntent.id).all()
+    if not intents:
+        return IntentMatcher.from_defaults()
+    fallback = next((i.response for i in intents if i.name == FALLBACK_INTENT), DEFAULT_FALLBACK)
+    return IntentMatcher(
+        [(i.name, [k.keyword for k in i.keywords], i.response) for i in intents if i.name != FALLBACK_INTENT],
+        fallback,
+    )
+
+
+_matcher = CachedValue(_load_matcher, float('inf'), _stamp)
+
+
+def get_matcher():
+    return _matcher.get()
+
+
+def chat_reply(message):
+    """The canned reply for a chat message."""
+    return get_matcher().reply(message)
+
+
+def invalidate_intents():
+    """Recompile the matcher in every worker."""
+    _matcher.invalidate()
+
+
+def seed_default_intents(replace=False):
+    """Store ``DEFAULT_INTENTS`` and the fallback reply; returns the number of intents written.
+
+    Existing intents are left alone unless ``replace`` is set.
+    """
+    from extensions import db
+
+    if ChatIntent.query.first() is not None:
+        if not replace:
+            return 0
+        ChatIntentKeyword.query.delete()
+        ChatIntent.query.delete()
+    for name, priority, keywords, response in DEFAULT_INTENTS:
+        intent = ChatIntent(name=name, priority=priority, response=response)
+        intent.keywords = [ChatIntentKeyword(keyword=k) for k in keywords]
+        db.session.add(intent)
+    db.session.add(ChatIntent(name=FALLBACK_INTENT, priority=1000, response=DEFAULT_FALLBACK))
+    db.session.commit()
+    return len(DEFAULT_INTENTS) + 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_intent_changes(session, flush_context):
+    if any(isinstance(obj, (ChatIntent, ChatIntentKeyword))
+           for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['intents_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('intents_changed', False):
+        invalidate_intents()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_intent_changes(session):
+    session.info.pop('intents_changed', None)
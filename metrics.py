@@ -0,0 +1,329 @@
+# metrics.py
+"""Request and SQL metrics in Prometheus text format, summed over every worker.
+
+Each request is timed from the first ``before_request`` hook to teardown
+and recorded under its endpoint, method and status:
+
+- ``aura_http_requests_total`` and the ``aura_http_request_duration_seconds``
+  histogram;
+- ``aura_db_queries_total`` and ``aura_db_query_seconds_total``, counted by
+  ``before/after_cursor_execute`` hooks on the engine, and the
+  ``aura_db_queries_per_request`` histogram, which makes N+1 pages stand
+  out. Queries run outside a request (ingest flushes, the outbox sender)
+  are counted under the endpoint ``background``.
+
+Every worker keeps its numbers in memory and writes them at most every
+``METRICS_PERSIST_INTERVAL`` seconds to its own JSON file in the shared
+state directory. ``/api/metrics`` adds up this worker's live numbers and
+every other worker's file. Files of workers that are gone are folded into
+``retired.json``, so counters keep growing across worker restarts.
+"""
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from shared_state import state_path
+
+try:
+    import fcntl
+except ImportError:  # no locking: files of dead workers are never folded
+    fcntl = None
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'aura_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.', None),
+    'aura_http_request_duration_seconds': ('histogram', 'Time spent handling HTTP requests.', DURATION_BUCKETS),
+    'aura_db_queries_total': ('counter', 'SQL statements executed, by endpoint.', None),
+    'aura_db_query_seconds_total': ('counter', 'Time spent executing SQL statements, by endpoint.', None),
+    'aura_db_queries_per_request': ('histogram', 'SQL statements executed per HTTP request.', QUERY_COUNT_BUCKETS),
+}
+
+BACKGROUND = 'background'
+RETIRED = 'retired'
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsStore:
+    """Counters and histograms of one process, keyed by ``(name, labels)``.
+
+    A histogram is stored as its per-bucket counts (the last one for
+    ``+Inf``), followed by the sum and count of observations.
+    """
+
+    def __init__(self):
+        self.persist_interval = 5.0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._token = None
+        self._last_persist = 0.0
+        self._reset()
+
+    def _reset(self):
+        # Forked workers must not report what the master recorded while booting
+        self._pid = os.getpid()
+        self._token = uuid.uuid4().hex[:8]
+        self.counters = {}
+        self.histograms = {}
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+    def inc(self, name, labels, value=1):
+        self._check_pid()
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        self._check_pid()
+        buckets = METRICS[name][2]
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self._lock:
+            key = (name, labels)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(buckets) + 3)
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        """This process's numbers as a JSON-serializable dict."""
+        self._check_pid()
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self.histograms.items()],
+            }
+
+    def maybe_persist(self):
+        if time.monotonic() - self._last_persist > self.persist_interval:
+            self.persist()
+
+    def persist(self):
+        """Write this worker's numbers to its file in the shared state directory."""
+        self._last_persist = time.monotonic()
+        _write_json(self._path(), self.snapshot())
+
+    def _path(self):
+        return state_path('metrics', f'{self._pid}-{self._token}.json')
+
+    def collect(self):
+        """Totals over this worker's live numbers and every other worker's file."""
+        self._check_pid()
+        _retire_dead_workers(exclude=self._path())
+        totals = {'counters': {}, 'histograms': {}}
+        _merge(totals, self.snapshot())
+        own = self._path()
+        for path in glob.glob(state_path('metrics', '*.json')):
+            if path == own:
+                continue
+            data = _read_json(path)
+            if data is not None:
+                _merge(totals, data)
+        return totals
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(totals, data):
+    counters, histograms = totals['counters'], totals['histograms']
+    for name, labels, value in data.get('counters', ()):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, values in data.get('histograms', ()):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = histograms.get(key)
+        if current is None or len(current) != len(values):
+            histograms[key] = list(values)
+        else:
+            histograms[key] = [a + b for a, b in zip(current, values)]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _retire_dead_workers(exclude):
+    """Fold the files of workers that no longer run into ``retired.json``."""
+    if fcntl is None:
+        return
+    dead = []
+    for path in glob.glob(state_path('metrics', '*-*.json')):
+        try:
+            pid = int(os.path.basename(path).split('-', 1)[0])
+        except ValueError:
+            continue
+        if path != exclude and not _pid_alive(pid):
+            dead.append(path)
+    if not dead:
+        return
+    with open(state_path('metrics', '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        totals = {'counters': {}, 'histograms': {}}
+        _merge(totals, _read_json(state_path('metrics', f'{RETIRED}.json')) or {})
+        folded = []
+        for path in dead:
+            data = _read_json(path)
+            if data is not None:
+                _merge(totals, data)
+                folded.append(path)
+        _write_json(state_path('metrics', f'{RETIRED}.json'), {
+            'counters': [[name, list(labels), value] for (name, labels), value in totals['counters'].items()],
+            'histograms': [[name, list(labels), values] for (name, labels), values in totals['histograms'].items()],
+        })
+        for path in folded:
+            os.remove(path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def render_prometheus(totals):
+    """Prometheus text exposition format (version 0.0.4) for ``collect()`` totals."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(totals['counters'].items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            continue
+        for (metric, labels), values in sorted(totals['histograms'].items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], values[:-2]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(values[-2]))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {values[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+metrics_store = MetricsStore()
+
+
+def _endpoint():
+    # The rule's endpoint, not the path, so label values stay bounded
+    return request.url_rule.endpoint if request.url_rule is not None else 'unmatched'
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_queries = 0
+    g._metrics_db_time = 0.0
+
+
+def _note_status(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    status = str(g.pop('_metrics_status', 500))
+    endpoint = _endpoint()
+    request_labels = _labels(endpoint=endpoint, method=request.method, status=status)
+    query_labels = _labels(endpoint=endpoint)
+    metrics_store.inc('aura_http_requests_total', request_labels)
+    metrics_store.observe('aura_http_request_duration_seconds', request_labels, elapsed)
+    metrics_store.inc('aura_db_queries_total', query_labels, g._metrics_queries)
+    metrics_store.inc('aura_db_query_seconds_total', query_labels, g._metrics_db_time)
+    metrics_store.observe('aura_db_queries_per_request', query_labels, g._metrics_queries)
+    metrics_store.maybe_persist()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop('metrics_query_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    if has_request_context() and '_metrics_start' in g:
+        g._metrics_queries += 1
+        g._metrics_db_time += elapsed
+    else:
+        labels = _labels(endpoint=BACKGROUND)
+        metrics_store.inc('aura_db_queries_total', labels)
+        metrics_store.inc('aura_db_query_seconds_total', labels, elapsed)
+
+
+def init_metrics(app):
+    app.config.setdefault('METRICS_ENABLED', os.getenv('METRICS_ENABLED', 'true').lower() == 'true')
+    # When set, /api/metrics requires "Authorization: Bearer <token>"; without
+    # one it is only served outside production
+    app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+    app.config.setdefault('METRICS_PUBLIC', os.getenv('FLASK_ENV') != 'production')
+    app.config.setdefault('METRICS_PERSIST_INTERVAL', 5.0)
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    metrics_store.persist_interval = app.config['METRICS_PERSIST_INTERVAL']
+    # Registered before the other extensions' hooks so their time is included
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_request)
+    app.after_request(_note_status)
+    app.teardown_request(_finish_request)
+
+    from extensions import db
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
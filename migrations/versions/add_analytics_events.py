@@ -0,0 +1,45 @@
+"""add_analytics_events
+
+Revision ID: add_analytics_events
+Revises: remove_security_key
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_analytics_events'
+down_revision = 'remove_security_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Interned event names and the append-only event store
+    op.create_table('event_types',
+        sa.Column('id', sa.SmallInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        if_not_exists=True
+    )
+    op.create_table('analytics_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_type_id', sa.SmallInteger(), nullable=False),
+        sa.Column('page_url', sa.String(length=500), nullable=True),
+        sa.Column('session_id', sa.String(length=100), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_type_id'], ['event_types.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_analytics_events_created_at', 'analytics_events', ['created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_analytics_events_created_at', table_name='analytics_events')
+    op.drop_table('analytics_events')
+    op.drop_table('event_types')
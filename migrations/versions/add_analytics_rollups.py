@@ -0,0 +1,53 @@
+"""add_analytics_rollups
+
+Revision ID: add_analytics_rollups
+Revises: add_analytics_events
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_analytics_rollups'
+down_revision = 'add_analytics_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Incremental page-view and session rollups; fill them with
+    # `flask analytics rollup` after upgrading
+    op.create_table('page_view_hourly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('page_url', sa.String(length=500), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('page_url', 'hour', name='uq_page_view_hourly_page_hour'),
+        if_not_exists=True
+    )
+    op.create_table('page_view_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('page_url', sa.String(length=500), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('page_url', 'day', name='uq_page_view_daily_page_day'),
+        if_not_exists=True
+    )
+    op.create_table('session_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('session_daily')
+    op.drop_table('page_view_daily')
+    op.drop_table('page_view_hourly')
@@ -0,0 +1,45 @@
+"""add_chat_intents
+
+Revision ID: add_chat_intents
+Revises: add_chatbot_transcript
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_chat_intents'
+down_revision = 'add_chatbot_transcript'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chat_intents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        if_not_exists=True
+    )
+    op.create_table('chat_intent_keywords',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('intent_id', sa.Integer(), nullable=False),
+        sa.Column('keyword', sa.String(length=100), nullable=False),
+        sa.ForeignKeyConstraint(['intent_id'], ['chat_intents.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index(op.f('ix_chat_intent_keywords_intent_id'), 'chat_intent_keywords', ['intent_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_chat_intent_keywords_intent_id'), table_name='chat_intent_keywords')
+    op.drop_table('chat_intent_keywords')
+    op.drop_table('chat_intents')
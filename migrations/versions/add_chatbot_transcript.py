@@ -0,0 +1,27 @@
+"""add_chatbot_transcript
+
+Revision ID: add_chatbot_transcript
+Revises: add_hot_table_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_chatbot_transcript'
+down_revision = 'add_hot_table_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Packed lead transcript; older conversations keep their chatbot_messages rows
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('chatbot_conversations')}
+    if 'transcript' not in columns:
+        op.add_column('chatbot_conversations', sa.Column('transcript', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('chatbot_conversations', 'transcript')
@@ -0,0 +1,42 @@
+"""add_hot_table_indexes
+
+Revision ID: add_hot_table_indexes
+Revises: add_email_outbox
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_table_indexes'
+down_revision = 'add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) for the filter and sort columns used by
+# admin.routes and api.routes; `flask check-query-plans` guards them
+INDEXES = [
+    ('ix_page_views_created_at', 'page_views', ['created_at']),
+    ('ix_page_views_page_url_created_at', 'page_views', ['page_url', 'created_at']),
+    ('ix_page_views_session_id_created_at', 'page_views', ['session_id', 'created_at']),
+    ('ix_visitor_sessions_last_activity', 'visitor_sessions', ['last_activity']),
+    ('ix_contact_messages_created_at', 'contact_messages', ['created_at']),
+    ('ix_contact_messages_status_created_at', 'contact_messages', ['status', 'created_at']),
+    ('ix_chatbot_conversations_created_at', 'chatbot_conversations', ['created_at']),
+    ('ix_chatbot_conversations_status_created_at', 'chatbot_conversations', ['status', 'created_at']),
+    ('ix_chatbot_messages_conversation_created_at', 'chatbot_messages', ['conversation_id', 'created_at']),
+]
+
+
+def upgrade():
+    # Databases built by db.create_all() may already have these
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
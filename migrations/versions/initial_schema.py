@@ -0,0 +1,129 @@
+"""initial_schema
+
+Revision ID: 43b153d88afb
+Revises: 
+Create Date: 2026-01-20 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '43b153d88afb'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built by db.create_all() before migrations were tracked
+    # already have these tables; they are only stamped and upgraded
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('security_key', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('username'),
+        if_not_exists=True
+    )
+    op.create_table('contact_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('subject', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('is_archived', sa.Boolean(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('priority', sa.String(length=10), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table('events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=150), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('image', sa.String(length=255), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('date', sa.DateTime(), nullable=True),
+        sa.Column('location', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table('chatbot_conversations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.String(length=100), nullable=False),
+        sa.Column('user_name', sa.String(length=120), nullable=True),
+        sa.Column('user_phone', sa.String(length=20), nullable=True),
+        sa.Column('user_email', sa.String(length=120), nullable=True),
+        sa.Column('service_requested', sa.String(length=200), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('last_activity', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table('chatbot_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('conversation_id', sa.Integer(), nullable=False),
+        sa.Column('sender', sa.String(length=20), nullable=False),
+        sa.Column('message_text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['conversation_id'], ['chatbot_conversations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table('page_views',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('page_url', sa.String(length=500), nullable=False),
+        sa.Column('page_title', sa.String(length=200), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('referrer', sa.String(length=500), nullable=True),
+        sa.Column('session_id', sa.String(length=100), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table('visitor_sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.String(length=100), nullable=False),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('last_activity', sa.DateTime(), nullable=True),
+        sa.Column('page_views_count', sa.Integer(), nullable=True),
+        sa.Column('duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('is_bounce', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('visitor_sessions')
+    op.drop_table('page_views')
+    op.drop_table('chatbot_messages')
+    op.drop_table('chatbot_conversations')
+    op.drop_table('events')
+    op.drop_table('contact_messages')
+    op.drop_table('users')
@@ -17,8 +17,11 @@ depends_on = None
 
 
 def upgrade():
-    # Remove the security_key column from users table
-    op.drop_column('users', 'security_key')
+    # Remove the security_key column from users table (databases built by
+    # db.create_all() never had it)
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'security_key' in columns:
+        op.drop_column('users', 'security_key')
 
 
 def downgrade():
@@ -28,6 +28,10 @@ class User(UserMixin, db.Model):
 class ContactMessage(db.Model):
     """Contact form submissions"""
     __tablename__ = "contact_messages"
+    __table_args__ = (
+        db.Index('ix_contact_messages_created_at', 'created_at'),
+        db.Index('ix_contact_messages_status_created_at', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -64,6 +68,10 @@ class Event(db.Model):
 class ChatbotConversation(db.Model):
     """Store AI chatbot conversations with users"""
     __tablename__ = "chatbot_conversations"
+    __table_args__ = (
+        db.Index('ix_chatbot_conversations_created_at', 'created_at'),
+        db.Index('ix_chatbot_conversations_status_created_at', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), nullable=False)
@@ -75,8 +83,9 @@ class ChatbotConversation(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     last_activity = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    transcript = db.Column(db.Text)  # packed transcript, see transcripts.py
     
-    # Relationship with messages
+    # Relationship with messages (conversations saved before packed transcripts)
     messages = db.relationship('ChatbotMessage', backref='conversation', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
@@ -85,6 +94,9 @@ class ChatbotConversation(db.Model):
 class ChatbotMessage(db.Model):
     """Individual messages in chatbot conversations"""
     __tablename__ = "chatbot_messages"
+    __table_args__ = (
+        db.Index('ix_chatbot_messages_conversation_created_at', 'conversation_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('chatbot_conversations.id'), nullable=False)
@@ -98,6 +110,11 @@ class ChatbotMessage(db.Model):
 class PageView(db.Model):
     """Track page views for analytics"""
     __tablename__ = "page_views"
+    __table_args__ = (
+        db.Index('ix_page_views_created_at', 'created_at'),
+        db.Index('ix_page_views_page_url_created_at', 'page_url', 'created_at'),
+        db.Index('ix_page_views_session_id_created_at', 'session_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     page_url = db.Column(db.String(500), nullable=False)
@@ -118,6 +135,9 @@ class PageView(db.Model):
 class VisitorSession(db.Model):
     """Track visitor sessions"""
     __tablename__ = "visitor_sessions"
+    __table_args__ = (
+        db.Index('ix_visitor_sessions_last_activity', 'last_activity'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), unique=True, nullable=False)
@@ -135,3 +155,115 @@ class VisitorSession(db.Model):
     
     def __repr__(self):
         return f'<VisitorSession {self.session_id} - {self.page_views_count} views>'
+
+class EventType(db.Model):
+    """Interned analytics event names, referenced by code from AnalyticsEvent"""
+    __tablename__ = "event_types"
+    
+    # SQLite only autoincrements a plain INTEGER primary key
+    id = db.Column(db.SmallInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f'<EventType {self.id}: {self.name}>'
+
+class AnalyticsEvent(db.Model):
+    """Append-only store for tracker events (clicks, form submits, page exits)"""
+    __tablename__ = "analytics_events"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_type_id = db.Column(db.SmallInteger, db.ForeignKey('event_types.id'), nullable=False)
+    page_url = db.Column(db.String(500))
+    session_id = db.Column(db.String(100))
+    payload = db.Column(db.Text)  # compact JSON
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    
+    # Relationship
+    event_type = db.relationship('EventType')
+    
+    def __repr__(self):
+        return f'<AnalyticsEvent {self.event_type_id} on {self.page_url}>'
+
+class PageViewHourly(db.Model):
+    """Page views per page and hour, maintained incrementally by the ingestion buffer"""
+    __tablename__ = "page_view_hourly"
+    __table_args__ = (db.UniqueConstraint('page_url', 'hour', name='uq_page_view_hourly_page_hour'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    page_url = db.Column(db.String(500), nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)  # UTC, truncated to the hour
+    views = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<PageViewHourly {self.page_url} {self.hour}: {self.views}>'
+
+class PageViewDaily(db.Model):
+    """Page views per page and day, maintained incrementally by the ingestion buffer"""
+    __tablename__ = "page_view_daily"
+    __table_args__ = (db.UniqueConstraint('page_url', 'day', name='uq_page_view_daily_page_day'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    page_url = db.Column(db.String(500), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # UTC
+    views = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<PageViewDaily {self.page_url} {self.day}: {self.views}>'
+
+class SessionDaily(db.Model):
+    """New visitor sessions per day"""
+    __tablename__ = "session_daily"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, unique=True, nullable=False)  # UTC
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<SessionDaily {self.day}: {self.sessions}>'
+
+class EmailOutbox(db.Model):
+    """Outgoing emails, delivered in the background by outbox.OutboxSender"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    html_body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    sent_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} to {self.recipient} ({self.status})>'
+
+class ChatIntent(db.Model):
+    """A canned /ai-chat reply, matched by its keywords (see intents.py)"""
+    __tablename__ = "chat_intents"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=100)  # lower wins
+    response = db.Column(db.Text, nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    keywords = db.relationship('ChatIntentKeyword', backref='intent', lazy=True, cascade='all, delete-orphan',
+                               order_by='ChatIntentKeyword.id')
+    
+    def __repr__(self):
+        return f'<ChatIntent {self.name}>'
+
+class ChatIntentKeyword(db.Model):
+    """A substring that selects its intent when found in a chat message"""
+    __tablename__ = "chat_intent_keywords"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    intent_id = db.Column(db.Integer, db.ForeignKey('chat_intents.id'), nullable=False, index=True)
+    keyword = db.Column(db.String(100), nullable=False)
+    
+    def __repr__(self):
+        return f'<ChatIntentKeyword {self.keyword}>'
@@ -0,0 +1,89 @@
+# notifications.py
+"""Admin notifications for new contact messages and chatbot leads.
+
+The poll cursor is the ETag ``"<last contact id>.<last conversation id>"``.
+A poll whose ``If-None-Match`` still matches gets a 304 with no body, and
+with ``wait`` it is held open (long-polled) until something new arrives.
+Waiting costs one ``stat`` of the shared version stamp per step, and the
+newest ids are cached per worker until the stamp is bumped, so idle polls
+never touch the database.
+"""
+import re
+import time
+
+from extensions import db
+from models import ChatbotConversation, ContactMessage
+from shared_state import CachedValue, VersionStamp
+
+# How long a cached cursor is trusted without a stamp bump
+NOTIFICATIONS_CACHE_TTL = 60
+
+# Most items returned by one poll
+NOTIFICATIONS_MAX_ITEMS = 10
+
+# Longest a poll may be held open, well inside the gunicorn worker timeout
+NOTIFICATIONS_MAX_WAIT = 25
+
+_TAG = re.compile(r'^W?/?"?(\d+)\.(\d+)"?$')
+
+_stamp = VersionStamp('notifications')
+
+
+def _load_cursor():
+    contact_id = db.session.query(db.func.coalesce(db.func.max(ContactMessage.id), 0)).scalar()
+    conversation_id = db.session.query(db.func.coalesce(db.func.max(ChatbotConversation.id), 0)).scalar()
+    return contact_id, conversation_id
+
+
+_cursor = CachedValue(_load_cursor, NOTIFICATIONS_CACHE_TTL, _stamp)
+
+
+def notify_new_activity():
+    """Wake long-polling admins in every worker after a new contact or lead is committed."""
+    _cursor.invalidate()
+
+
+def current_cursor():
+    return _cursor.get()
+
+
+def format_etag(cursor):
+    return '%d.%d' % cursor
+
+
+def parse_etag(value):
+    """Return the cursor encoded in an ``If-None-Match`` value, or None."""
+    match = _TAG.match((value or '').strip())
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def wait_for_change(cursor, timeout, step=1.0):
+    """Block for up to ``timeout`` seconds until the cursor moves past ``cursor``."""
+    deadline = time.monotonic() + timeout
+    version = _stamp.current()
+    # Don't hold a pooled connection while idle
+    db.session.close()
+    while time.monotonic() < deadline:
+        time.sleep(min(step, max(0.0, deadline - time.monotonic())))
+        if _stamp.current() != version:
+            version = _stamp.current()
+            if current_cursor() != cursor:
+                break
+    return current_cursor()
+
+
+def notifications_since(cursor):
+    """Notification dicts for contacts and conversations newer than ``cursor``."""
+    contact_id, conversation_id = cursor
+    items = []
+    contacts = ContactMessage.query.filter(ContactMessage.id > contact_id) \
+        .order_by(ContactMessage.id.desc()).limit(NOTIFICATIONS_MAX_ITEMS).all()
+    for message in reversed(contacts):
+        items.append({'type': 'info', 'message': f'New message from {message.name}: {message.subject}'})
+    conversations = ChatbotConversation.query.filter(ChatbotConversation.id > conversation_id) \
+        .order_by(ChatbotConversation.id.desc()).limit(NOTIFICATIONS_MAX_ITEMS).all()
+    for conversation in reversed(conversations):
+        name = conversation.user_name or 'a visitor'
+        service = f' ({conversation.service_requested})' if conversation.service_requested else ''
+        items.append({'type': 'success', 'message': f'New chatbot lead from {name}{service}'})
+    return items[-NOTIFICATIONS_MAX_ITEMS:]
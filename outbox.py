@@ -0,0 +1,204 @@
+# outbox.py
+"""Transactional email outbox with background SMTP delivery.
+
+Requests only add an ``EmailOutbox`` row in the same transaction as the data
+that triggered it. Each worker runs an ``OutboxSender`` thread that claims
+due rows, sends them over a single SMTP connection per batch and retries
+failures with exponential backoff. ``flask outbox send`` delivers
+synchronously, e.g. against a local SMTP stand-in::
+
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=false flask outbox send
+"""
+import os
+import smtplib
+import threading
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from extensions import db
+from models import EmailOutbox
+from shared_state import ProcessThread
+
+
+def enqueue_email(recipient, subject, html_body):
+    """Add an email to the outbox. The caller commits it with its own work."""
+    entry = EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        html_body=html_body,
+        status='pending',
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.session.add(entry)
+    return entry
+
+
+class OutboxSender:
+    """Per-worker background thread that delivers due outbox entries."""
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self._worker = ProcessThread(self._run, 'OutboxSender')
+        self._wake = threading.Event()
+        self._send_lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('OUTBOX_ENABLED', bool(app.config.get('MAIL_PASSWORD') or os.environ.get('MAIL_SERVER')))
+        app.config.setdefault('OUTBOX_SENDER', os.environ.get('CONTACT_NOTIFY_EMAIL', 'vs8890864@gmail.com'))
+        app.config.setdefault('OUTBOX_POLL_INTERVAL', 30.0)
+        app.config.setdefault('OUTBOX_BATCH_SIZE', 50)
+        app.config.setdefault('OUTBOX_MAX_ATTEMPTS', 6)
+        app.config.setdefault('OUTBOX_BACKOFF_BASE', 30)
+        app.config.setdefault('OUTBOX_BACKOFF_MAX', 3600)
+        app.config.setdefault('OUTBOX_LEASE_SECONDS', 300)
+        app.config.setdefault('OUTBOX_SMTP_TIMEOUT', 30)
+
+        self.app = app
+        self.enabled = app.config['OUTBOX_ENABLED']
+
+        @app.before_request
+        def start_outbox_sender():
+            self.ensure_running()
+
+    def wake(self):
+        """Ask the sender to deliver now instead of at its next poll."""
+        if self.enabled:
+            self.ensure_running()
+            self._wake.set()
+
+    def ensure_running(self):
+        if self.enabled:
+            self._worker.start()
+
+    def _run(self):
+        while self._worker.running():
+            try:
+                self.send_pending()
+            except Exception:
+                self.app.logger.exception('Outbox delivery failed')
+            self._wake.wait(self.app.config['OUTBOX_POLL_INTERVAL'])
+            self._wake.clear()
+
+    def send_pending(self):
+        """Deliver every due entry. Returns ``(sent, failed)`` counts."""
+        sent = failed = 0
+        with self._send_lock, self.app.app_context():
+            while True:
+                batch = self._claim_batch()
+                if not batch:
+                    return sent, failed
+                batch_sent, batch_failed = self._deliver(batch)
+                sent += batch_sent
+                failed += batch_failed
+
+    def _claim_batch(self):
+        """Lease up to ``OUTBOX_BATCH_SIZE`` due entries so no other worker sends them."""
+        config = self.app.config
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=config['OUTBOX_LEASE_SECONDS'])
+
+        # 'sending' rows whose lease ran out belong to a worker that died mid-send
+        due = EmailOutbox.query.filter(
+            EmailOutbox.status.in_(('pending', 'sending')),
+            EmailOutbox.next_attempt_at <= now,
+        ).order_by(EmailOutbox.next_attempt_at).limit(config['OUTBOX_BATCH_SIZE']).all()
+
+        claimed = []
+        for entry in due:
+            result = db.session.execute(
+                db.update(EmailOutbox)
+                .where(EmailOutbox.id == entry.id, EmailOutbox.next_attempt_at <= now,
+                       EmailOutbox.status.in_(('pending', 'sending')))
+                .values(status='sending', next_attempt_at=lease_until)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                claimed.append(entry.id)
+        db.session.commit()
+
+        if not claimed:
+            return []
+        return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
+    def _connect(self):
+        config = self.app.config
+        smtp = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=config['OUTBOX_SMTP_TIMEOUT'])
+        if config.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if config.get('MAIL_PASSWORD'):
+            smtp.login(config['OUTBOX_SENDER'], config['MAIL_PASSWORD'])
+        return smtp
+
+    def _deliver(self, batch):
+        sent = failed = 0
+        try:
+            smtp = self._connect()
+        except Exception as e:
+            # Nothing can be sent on this round; every claimed entry retries later
+            for entry in batch:
+                self._schedule_retry(entry, e)
+            db.session.commit()
+            return 0, len(batch)
+
+        try:
+            for entry in batch:
+                try:
+                    smtp.send_message(self._build_message(entry))
+                except smtplib.SMTPServerDisconnected as e:
+                    self._schedule_retry(entry, e)
+                    failed += 1
+                    smtp = self._connect()
+                except Exception as e:
+                    self._schedule_retry(entry, e)
+                    failed += 1
+                else:
+                    entry.status = 'sent'
+                    entry.attempts += 1
+                    entry.sent_at = datetime.now(timezone.utc)
+                    entry.last_error = None
+                    sent += 1
+                # Persist each outcome so a crash never causes a duplicate send
+                db.session.commit()
+        except Exception as e:
+            # Reconnecting failed; leave the rest of the batch for the next round
+            for entry in batch:
+                if entry.status == 'sending':
+                    self._schedule_retry(entry, e)
+                    failed += 1
+            db.session.commit()
+        finally:
+            try:
+                smtp.quit()
+            except Exception:
+                pass
+        return sent, failed
+
+    def _schedule_retry(self, entry, error):
+        config = self.app.config
+        entry.attempts += 1
+        entry.last_error = str(error)
+        if entry.attempts >= config['OUTBOX_MAX_ATTEMPTS']:
+            entry.status = 'failed'
+            self.app.logger.error('Giving up on outbox email %s after %s attempts: %s', entry.id, entry.attempts, error)
+            return
+        delay = min(config['OUTBOX_BACKOFF_BASE'] * 2 ** (entry.attempts - 1), config['OUTBOX_BACKOFF_MAX'])
+        entry.status = 'pending'
+        entry.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    def _build_message(self, entry):
+        msg = MIMEMultipart()
+        msg['From'] = self.app.config['OUTBOX_SENDER']
+        msg['To'] = entry.recipient
+        msg['Subject'] = entry.subject
+        msg.attach(MIMEText(entry.html_body, 'html'))
+        return msg
+
+
+outbox_sender = OutboxSender()
+
+
+def init_outbox(app):
+    outbox_sender.init_app(app)
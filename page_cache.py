@@ -0,0 +1,110 @@
+# page_cache.py
+"""Rendered-response cache for the static marketing pages.
+
+Views decorated with ``@page_cache.cached`` render once per worker and per
+cache key (endpoint plus the template context that can vary, currently the
+``admin_exists`` flag). Responses carry a strong ETag so revalidations get a
+304 with no body. Logged-in users, pending flash messages and anything that
+touches the session bypass the cache.
+"""
+import hashlib
+import os
+import threading
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+
+class PageCache:
+
+    def __init__(self):
+        self.app = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_ENABLED', os.getenv('PAGE_CACHE_ENABLED', str(not app.debug)).lower() == 'true')
+        app.config.setdefault('PAGE_CACHE_MAX_AGE', 300)
+        app.config.setdefault('PAGE_CACHE_WARM', True)
+        self.app = app
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self._cacheable_request():
+                return view(*args, **kwargs)
+
+            key = self._key()
+            entry = self._entries.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if not self._cacheable_response(response):
+                    return response
+                entry = self._store(key, response)
+            return self._respond(entry)
+
+        wrapper.page_cached = True
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def warm(self):
+        """Render every cached page once, e.g. at worker start."""
+        app = self.app
+        if not app.config['PAGE_CACHE_ENABLED']:
+            return 0
+        client = app.test_client()
+        warmed = 0
+        for rule in app.url_map.iter_rules():
+            view = app.view_functions.get(rule.endpoint)
+            if not getattr(view, 'page_cached', False) or rule.arguments or 'GET' not in rule.methods:
+                continue
+            try:
+                if client.get(rule.rule).status_code == 200:
+                    warmed += 1
+            except Exception:
+                app.logger.exception('Could not warm page cache for %s', rule.rule)
+        return warmed
+
+    def _key(self):
+        from auth.routes import admin_exists
+        return (request.endpoint, admin_exists())
+
+    def _cacheable_request(self):
+        if not current_app.config['PAGE_CACHE_ENABLED'] or request.method not in ('GET', 'HEAD'):
+            return False
+        if '_flashes' in session:
+            return False
+        return not current_user.is_authenticated
+
+    def _cacheable_response(self, response):
+        return (response.status_code == 200
+                and not response.is_streamed
+                and 'Set-Cookie' not in response.headers
+                and not session.modified)
+
+    def _store(self, key, response):
+        body = response.get_data()
+        entry = {
+            'body': body,
+            'etag': hashlib.sha256(body).hexdigest()[:32],
+            'content_type': response.content_type,
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _respond(self, entry):
+        response = current_app.response_class(entry['body'], content_type=entry['content_type'])
+        response.set_etag(entry['etag'])
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+        # The same URL renders differently once a visitor logs in
+        response.vary.add('Cookie')
+        return response.make_conditional(request)
+
+
+page_cache = PageCache()
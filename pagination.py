@@ -0,0 +1,79 @@
+# pagination.py
+"""Keyset (cursor) pagination for the admin list views.
+
+Pages are ordered newest first by ``(created_at, id)`` and addressed by an
+opaque cursor naming the boundary row, so every page is an index range
+scan no matter how deep it is. Totals come from the cached stats service
+rather than a ``COUNT(*)`` per page.
+"""
+import base64
+import math
+from datetime import datetime
+
+from extensions import db
+
+
+def encode_cursor(row):
+    raw = f'{row.created_at.isoformat()}|{row.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` for a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query."""
+
+    def __init__(self, items, per_page, total, has_next, has_prev):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = encode_cursor(items[-1]) if has_next and items else None
+        self.prev_cursor = encode_cursor(items[0]) if has_prev and items else None
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page)) if self.total else 1
+
+
+def keyset_statement(statement, model, after=None, before=None, per_page=20):
+    """Limit ``statement`` to the rows after or before a decoded ``(created_at, id)`` cursor.
+
+    Fetches one row more than ``per_page`` to tell whether there is another
+    page. With ``before`` the rows come oldest first.
+    """
+    key = db.tuple_(model.created_at, model.id)
+    if before is not None:
+        # Walk backwards (ascending) from the cursor
+        return statement.where(key > db.tuple_(*before)) \
+            .order_by(model.created_at.asc(), model.id.asc()).limit(per_page + 1)
+    if after is not None:
+        statement = statement.where(key < db.tuple_(*after))
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(per_page + 1)
+
+
+def keyset_paginate(statement, model, after=None, before=None, per_page=20, total=0):
+    """Return the page of ``statement`` after (older than) or before (newer than) a cursor.
+
+    ``statement`` is an unordered ``select(model)``; ``total`` is the
+    (approximate) row count to show alongside the page.
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+    rows = db.session.scalars(keyset_statement(statement, model, after, before, per_page)).all()
+
+    if before is not None:
+        # Restore newest-first order
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        return KeysetPage(items, per_page, total, has_next=True, has_prev=has_prev)
+    return KeysetPage(rows[:per_page], per_page, total, has_next=len(rows) > per_page, has_prev=after is not None)
@@ -0,0 +1,83 @@
+# query_plans.py
+"""Query-plan regression checks for the hot admin and API queries.
+
+Each entry is built by the same statement helper the admin or API code
+executes (``admin.routes``, ``pagination``, ``stats``, ``rollups`` and
+``ingest``), so the checked queries can't drift from the real ones.
+``check_query_plans`` runs ``EXPLAIN QUERY PLAN`` for each of them on SQLite
+and reports every query whose plan contains a full table scan, i.e. a
+``SCAN <table>`` step that does not use an index. Run it with
+``flask check-query-plans``; it exits non-zero on a regression.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import sqlite
+
+from admin.routes import conversation_messages_statement, export_statement, recent_statement, status_statement
+from extensions import db
+from ingest import existing_sessions_statement
+from models import ChatbotConversation, ContactMessage, PageView
+from pagination import keyset_statement
+from rollups import top_pages_statement
+from stats import chatbot_stats_statement, contact_stats_statement
+
+_FULL_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)')
+
+
+def hot_queries():
+    """``(name, statement)`` pairs for the queries that must stay index-driven."""
+    since = datetime.now(timezone.utc) - timedelta(minutes=30)
+    cursor = (since, 1000)
+    return [
+        ('dashboard: recent contacts', recent_statement(ContactMessage, 5)),
+        ('dashboard: recent chatbot conversations', recent_statement(ChatbotConversation, 5)),
+        ('messages: list by status',
+         keyset_statement(status_statement(ContactMessage, 'new'), ContactMessage)),
+        ('messages: keyset page after cursor',
+         keyset_statement(status_statement(ContactMessage, 'all'), ContactMessage, after=cursor)),
+        ('messages: keyset page by status after cursor',
+         keyset_statement(status_statement(ContactMessage, 'new'), ContactMessage, after=cursor)),
+        ('messages: status counts', contact_stats_statement()),
+        ('chatbot: keyset page before cursor',
+         keyset_statement(status_statement(ChatbotConversation, 'all'), ChatbotConversation, before=cursor)),
+        ('chatbot: list by status',
+         keyset_statement(status_statement(ChatbotConversation, 'active'), ChatbotConversation)),
+        ('chatbot: status counts', chatbot_stats_statement()),
+        ('view_conversation: messages', conversation_messages_statement(1)),
+        ('analytics: recent page views', recent_statement(PageView, 100)),
+        ('analytics: top pages', top_pages_statement(10)),
+        ('track: session lookup', existing_sessions_statement(['a', 'b'])),
+        ('export: page views of a page',
+         export_statement(PageView.__table__, [PageView.page_url == '/'])),
+        ('export: page views since a date',
+         export_statement(PageView.__table__, [PageView.created_at >= since])),
+        ('export: messages by status',
+         export_statement(ContactMessage.__table__, [ContactMessage.status == 'new'])),
+    ]
+
+
+def explain(connection, statement):
+    """Return the ``EXPLAIN QUERY PLAN`` detail lines for ``statement``."""
+    sql = str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def check_query_plans(engine=None):
+    """Explain every hot query and return ``(name, plan, full_scans)`` for each.
+
+    Without ``engine`` the schema is built from the models in an in-memory
+    SQLite database, so the check covers the declared indexes.
+    """
+    if engine is None:
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+
+    results = []
+    with engine.connect() as connection:
+        for name, statement in hot_queries():
+            plan = explain(connection, statement)
+            scans = [m.group(1) for line in plan for m in _FULL_SCAN.finditer(line)]
+            results.append((name, plan, scans))
+    return results
@@ -0,0 +1,125 @@
+# realtime.py
+"""Shared realtime analytics snapshot for the admin dashboards.
+
+One ``RealtimeAggregator`` per worker refreshes the visitor, page-view and
+active-session numbers on a fixed schedule and hands the same snapshot to
+every caller of /api/analytics/realtime and every open
+/api/analytics/stream connection. Database load therefore depends on the
+refresh interval, not on how many dashboards are open. The refresher only
+runs while someone has asked for numbers recently.
+
+Active sessions and unique visitors come from the ``visitors`` sliding-window
+sketches fed by the tracking endpoints, so a refresh never scans
+``visitor_sessions``.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+import rollups
+from shared_state import ProcessThread
+from sketches import SlidingWindowSketches
+
+# Unique sessions and IPs over the realtime windows, shared across workers
+visitors = SlidingWindowSketches('visitors')
+
+
+class RealtimeAggregator:
+
+    def __init__(self):
+        self.app = None
+        self.interval = 5.0
+        self.idle_timeout = 60.0
+        self._snapshot = None
+        self._version = 0
+        self._last_access = 0.0
+        self._subscribers = 0
+        self._changed = threading.Condition()
+        self._worker = ProcessThread(self._run, 'RealtimeAggregator')
+
+    def init_app(self, app):
+        app.config.setdefault('REALTIME_REFRESH_INTERVAL', 5.0)
+        app.config.setdefault('REALTIME_IDLE_TIMEOUT', 60.0)
+        app.config.setdefault('REALTIME_STREAM_MAX_AGE', 90)
+        app.config.setdefault('REALTIME_SKETCH_PRECISION', 10)
+        app.config.setdefault('REALTIME_SKETCH_PERSIST_INTERVAL', 5.0)
+        visitors.precision = app.config['REALTIME_SKETCH_PRECISION']
+        visitors.persist_interval = app.config['REALTIME_SKETCH_PERSIST_INTERVAL']
+        self.app = app
+        self.interval = app.config['REALTIME_REFRESH_INTERVAL']
+        self.idle_timeout = app.config['REALTIME_IDLE_TIMEOUT']
+
+    def snapshot(self):
+        """Return the latest numbers, computing them first if there are none yet."""
+        self._touch()
+        if self._snapshot is None:
+            self.refresh()
+        return self._snapshot
+
+    def subscribe(self):
+        """Yield each new snapshot as it is published, or None every ``interval * 3`` seconds as a keepalive."""
+        with self._changed:
+            self._subscribers += 1
+        try:
+            version = None
+            while True:
+                self._touch()
+                with self._changed:
+                    if self._version == version or self._snapshot is None:
+                        self._changed.wait(self.interval * 3)
+                    if self._snapshot is None or self._version == version:
+                        snapshot = None
+                    else:
+                        snapshot, version = self._snapshot, self._version
+                yield snapshot
+        finally:
+            with self._changed:
+                self._subscribers -= 1
+
+    def refresh(self):
+        with self.app.app_context():
+            snapshot = self.compute()
+        with self._changed:
+            self._snapshot = snapshot
+            self._version += 1
+            self._changed.notify_all()
+
+    def compute(self):
+        total_page_views, total_sessions = rollups.totals()
+        sessions_5m, ips_5m = visitors.window(5 * 60)
+        sessions_30m, ips_30m = visitors.window(30 * 60)
+        sessions_24h, ips_24h = visitors.window(24 * 3600)
+        return {
+            'total_visitors': total_sessions,
+            'total_page_views': total_page_views,
+            'active_sessions': sessions_30m,
+            'unique_sessions': {'5m': sessions_5m, '30m': sessions_30m, '24h': sessions_24h},
+            'unique_ips': {'5m': ips_5m, '30m': ips_30m, '24h': ips_24h},
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _touch(self):
+        self._last_access = time.monotonic()
+        self._worker.start()
+
+    def _run(self):
+        while self._worker.running():
+            idle = time.monotonic() - self._last_access > self.idle_timeout
+            if idle and not self._subscribers:
+                # Nobody is watching: stop, the next request restarts us
+                self._worker.stop()
+                self._snapshot = None
+                return
+            try:
+                self.refresh()
+            except Exception:
+                self.app.logger.exception('Realtime analytics refresh failed')
+            time.sleep(self.interval)
+
+
+def record_visit(session_id, ip_address):
+    """Count a page view towards the realtime unique-visitor windows."""
+    visitors.add(session_id, ip_address)
+
+
+realtime = RealtimeAggregator()
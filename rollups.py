@@ -0,0 +1,127 @@
+# rollups.py
+"""Incrementally maintained page-view and session rollups.
+
+The ingestion buffer folds every flushed batch into hourly and daily
+counters, so the admin analytics page and /api/analytics/realtime read
+totals and top pages from these small tables instead of scanning
+``page_views``. ``rebuild_rollups`` recomputes them from the raw tables for
+backfills and catch-up runs (``flask analytics rollup``). Rollups outlive the
+raw rows: archived days keep their counts.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone
+
+from db_helpers import upsert
+from extensions import db
+from models import PageView, PageViewDaily, PageViewHourly, SessionDaily, VisitorSession
+
+
+def _utc(value):
+    """Return ``value`` as a naive UTC datetime, the form stored in rollup columns."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _apply(hourly, daily, sessions):
+    upsert(PageViewHourly,
+           [{'page_url': url, 'hour': hour, 'views': views} for (url, hour), views in hourly.items()],
+           ['page_url', 'hour'], increment=['views'])
+    upsert(PageViewDaily,
+           [{'page_url': url, 'day': day, 'views': views} for (url, day), views in daily.items()],
+           ['page_url', 'day'], increment=['views'])
+    upsert(SessionDaily,
+           [{'day': day, 'sessions': count} for day, count in sessions.items()],
+           ['day'], increment=['sessions'])
+
+
+def _count_pageview(hourly, daily, page_url, created_at):
+    created_at = _utc(created_at)
+    hourly[(page_url, created_at.replace(minute=0, second=0, microsecond=0))] += 1
+    daily[(page_url, created_at.date())] += 1
+
+
+def record_pageviews(records, new_session_starts=()):
+    """Add a batch of page-view rows (and the start times of new sessions) to the rollups."""
+    hourly, daily = Counter(), Counter()
+    for record in records:
+        _count_pageview(hourly, daily, record['page_url'], record['created_at'])
+    sessions = Counter(_utc(start).date() for start in new_session_starts)
+    _apply(hourly, daily, sessions)
+
+
+def rebuild_rollups(since=None, batch_size=5000):
+    """Recompute the rollups from ``page_views`` and ``visitor_sessions``.
+
+    With ``since`` (a date) only that day onward is rebuilt; otherwise every
+    day is. Today (UTC) is never rebuilt: the ingest flushers of every
+    worker keep adding to its rows, and an increment landing between the
+    delete and the re-insert would be lost or counted twice. Only days that still have raw rows are replaced, so the counts
+    for days moved out by ``archive.archive_analytics`` survive a rebuild.
+    Sessions are archived by last activity, so a day before the cutoff can
+    keep a few long-lived sessions; session days before the first day with
+    raw page views are therefore left alone too.
+    Raw rows are streamed, so memory grows with the number of distinct
+    page/hour pairs, not with the table. Returns the number of page views
+    and sessions counted.
+    """
+    since_dt = datetime.combine(since, time.min) if since else None
+    # Closed days only; stored timestamps are naive UTC
+    until = datetime.combine(datetime.now(timezone.utc).date(), time.min)
+
+    pageviews = db.select(PageView.page_url, PageView.created_at).where(PageView.created_at < until)
+    session_starts = db.select(VisitorSession.start_time).where(VisitorSession.start_time < until)
+    if since_dt:
+        pageviews = pageviews.where(PageView.created_at >= since_dt)
+        session_starts = session_starts.where(VisitorSession.start_time >= since_dt)
+
+    hourly, daily = Counter(), Counter()
+    pageview_total = 0
+    for page_url, created_at in db.session.execute(pageviews.execution_options(yield_per=batch_size)):
+        _count_pageview(hourly, daily, page_url, created_at)
+        pageview_total += 1
+
+    sessions = Counter()
+    for (start_time,) in db.session.execute(session_starts.execution_options(yield_per=batch_size)):
+        sessions[_utc(start_time).date()] += 1
+
+    pageview_days = sorted({day for _, day in daily})
+    sessions = Counter({day: n for day, n in sessions.items() if pageview_days and day >= pageview_days[0]})
+    for day in pageview_days:
+        start = datetime.combine(day, time.min)
+        PageViewHourly.query.filter(PageViewHourly.hour >= start,
+                                    PageViewHourly.hour < start + timedelta(days=1)).delete(synchronize_session=False)
+    for chunk in range(0, len(pageview_days), 500):
+        PageViewDaily.query.filter(PageViewDaily.day.in_(pageview_days[chunk:chunk + 500])).delete(synchronize_session=False)
+    session_days = sorted(sessions)
+    for chunk in range(0, len(session_days), 500):
+        SessionDaily.query.filter(SessionDaily.day.in_(session_days[chunk:chunk + 500])).delete(synchronize_session=False)
+
+    _apply(hourly, daily, sessions)
+    db.session.commit()
+    return pageview_total, sum(sessions.values())
+
+
+def totals():
+    """``(page_views, sessions)`` totals in one query."""
+    page_views = db.select(db.func.coalesce(db.func.sum(PageViewDaily.views), 0)).scalar_subquery()
+    sessions = db.select(db.func.coalesce(db.func.sum(SessionDaily.sessions), 0)).scalar_subquery()
+    return tuple(db.session.execute(db.select(page_views, sessions)).one())
+
+
+def total_page_views():
+    return db.session.query(db.func.coalesce(db.func.sum(PageViewDaily.views), 0)).scalar()
+
+
+def total_sessions():
+    return db.session.query(db.func.coalesce(db.func.sum(SessionDaily.sessions), 0)).scalar()
+
+
+def top_pages_statement(limit=10):
+    views = db.func.sum(PageViewDaily.views).label('views')
+    return db.select(PageViewDaily.page_url, views).group_by(PageViewDaily.page_url).order_by(views.desc()).limit(limit)
+
+
+def top_pages(limit=10):
+    """Most viewed pages as ``(page_url, views)`` rows."""
+    return db.session.execute(top_pages_statement(limit)).all()
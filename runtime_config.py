@@ -0,0 +1,141 @@
+# runtime_config.py
+"""Gunicorn and connection-pool sizing derived from the host and the database.
+
+Every gunicorn worker holds its own SQLAlchemy pool, so the number of
+connections the app can open is ``workers x (pool_size + max_overflow)``.
+``server_plan`` sizes both sides together:
+
+- threads per worker come from ``GUNICORN_THREADS`` (default 4; more than
+  one selects the ``gthread`` worker class), and workers from
+  ``WEB_CONCURRENCY`` or the CPU count (``2 x CPUs + 1`` for sync workers,
+  ``CPUs + 1`` for threaded ones). The CPU count honours a container's
+  cgroup CPU quota, not just the host's cores;
+- SQLite has a single writer, so without ``WEB_CONCURRENCY`` at most
+  ``SQLITE_MAX_WORKERS`` workers share the database file;
+- each worker needs a connection per request thread plus
+  ``BACKGROUND_CONNECTIONS`` for the ingest, outbox and realtime threads;
+- ``DB_MAX_CONNECTIONS`` (default 20 for a server database, unlimited for
+  SQLite) less ``DB_RESERVED_CONNECTIONS`` for release commands and
+  consoles is the budget. Workers, then threads, are reduced until the
+  pools fit, and leftover budget becomes overflow for bursts (at most one
+  extra connection per thread).
+
+Both ``gunicorn.conf.py`` and ``create_app`` call it, and it only reads
+the environment, so the master and every worker agree on the plan.
+"""
+import math
+import os
+from collections import namedtuple
+
+from db_pool import InstrumentedQueuePool
+
+# Connections a worker's background threads may hold besides request threads
+BACKGROUND_CONNECTIONS = 2
+
+# Default worker cap on SQLite: more processes only contend for the write lock
+SQLITE_MAX_WORKERS = 2
+
+# cgroup v2, then v1: CPU time the container may use per period
+CGROUP_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+ServerPlan = namedtuple('ServerPlan', 'cpus workers threads worker_class timeout pool_size max_overflow pool_timeout')
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_quota():
+    """CPUs allowed by the cgroup CPU quota (rounded up), or None without a quota."""
+    limit = _read(CGROUP_CPU_MAX)
+    if limit is None:
+        quota, period = _read(CGROUP_V1_QUOTA), _read(CGROUP_V1_PERIOD)
+        limit = quota + period if quota and period else None
+    if not limit or len(limit) < 2 or limit[0] in ('max', '-1'):
+        return None
+    try:
+        quota, period = int(limit[0]), int(limit[1])
+    except ValueError:
+        return None
+    return max(1, math.ceil(quota / period)) if quota > 0 and period > 0 else None
+
+
+def cpu_count():
+    """CPUs this process may run on (respects CPU affinity and the cgroup quota)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    return min(cpus, quota) if quota else cpus
+
+
+def _env_int(env, name, default):
+    value = env.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def is_sqlite(database_url):
+    return database_url.startswith('sqlite')
+
+
+def server_plan(env=os.environ, cpus=None):
+    cpus = cpus or cpu_count()
+    database_url = env.get('DATABASE_URL') or 'sqlite:///aura.db'
+
+    threads = max(1, _env_int(env, 'GUNICORN_THREADS', 4))
+    workers = _env_int(env, 'WEB_CONCURRENCY', 0)
+    if not workers:
+        workers = cpus + 1 if threads > 1 else 2 * cpus + 1
+        if is_sqlite(database_url):
+            workers = min(workers, SQLITE_MAX_WORKERS)
+    timeout = _env_int(env, 'GUNICORN_TIMEOUT', 120)
+    # Fail a request that can't get a connection well before gunicorn kills the worker
+    pool_timeout = _env_int(env, 'DB_POOL_TIMEOUT', min(10, timeout // 2))
+
+    default_budget = 0 if is_sqlite(database_url) else 20
+    budget = _env_int(env, 'DB_MAX_CONNECTIONS', default_budget)
+    if not budget:
+        # No connection limit: a pool per worker sized for its threads, with some headroom
+        pool_size = threads + BACKGROUND_CONNECTIONS
+        return ServerPlan(cpus, workers, threads, 'gthread' if threads > 1 else 'sync', timeout,
+                          pool_size, threads, pool_timeout)
+
+    available = max(1, budget - _env_int(env, 'DB_RESERVED_CONNECTIONS', 3))
+    needed = threads + BACKGROUND_CONNECTIONS
+    workers = max(1, min(workers, available // needed))
+    if workers * needed > available:
+        # Not even one worker fits: fewer threads, always leaving one for requests
+        threads = max(1, available - BACKGROUND_CONNECTIONS)
+        needed = min(available, threads + BACKGROUND_CONNECTIONS)
+    per_worker = available // workers
+    return ServerPlan(cpus, workers, threads, 'gthread' if threads > 1 else 'sync', timeout,
+                      needed, min(per_worker - needed, threads), pool_timeout)
+
+
+def engine_options(database_url, plan, env=os.environ):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``plan``."""
+    if database_url in ('sqlite://', 'sqlite:///:memory:'):
+        # One shared in-memory database per process; nothing to pool
+        return {}
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': plan.pool_size,
+        'max_overflow': plan.max_overflow,
+        'pool_timeout': plan.pool_timeout,
+    }
+    if not is_sqlite(database_url):
+        # Drop connections the server or a proxy closed while idle
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = _env_int(env, 'DB_POOL_RECYCLE', 300)
+    if database_url.startswith('postgres'):
+        # Stop runaway queries before the request itself times out
+        statement_timeout = _env_int(env, 'DB_STATEMENT_TIMEOUT_MS', (plan.timeout - plan.pool_timeout) * 1000 // 2)
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
@@ -1,42 +1,52 @@
 # seed_admin.py
 # Script to create admin account automatically on deployment
-from app import create_app
+# (also available as `flask seed-admin`, which the Procfile uses)
 from models import User, db
+from auth.routes import invalidate_admin_exists
 import os
 
+def ensure_admin_account():
+    """Create the admin account from the environment if none exists; returns (admin, created)"""
+    # Check if admin already exists
+    existing_admin = User.query.filter_by(is_admin=True).first()
+    if existing_admin:
+        return existing_admin, False
+    
+    # Get admin credentials from environment variables
+    admin_email = os.getenv('ADMIN_EMAIL', 'vs8890864@gmail.com')
+    admin_username = os.getenv('ADMIN_USERNAME', 'vinay')
+    admin_password = os.getenv('ADMIN_PASSWORD', 'admin123')
+    
+    # Create admin user
+    admin_user = User(
+        username=admin_username,
+        email=admin_email,
+        is_admin=True,
+        is_active=True
+    )
+    admin_user.set_password(admin_password)
+    
+    db.session.add(admin_user)
+    db.session.commit()
+    invalidate_admin_exists()
+    return admin_user, True
+
 def create_admin_account():
     """Create admin account if it doesn't exist"""
+    from app import create_app
     app = create_app()
     
     with app.app_context():
-        # Check if admin already exists
-        existing_admin = User.query.filter_by(is_admin=True).first()
-        
-        if existing_admin:
-            print(f"✅ Admin account already exists: {existing_admin.email}")
-            return existing_admin
-        
-        # Get admin credentials from environment variables
-        admin_email = os.getenv('ADMIN_EMAIL', 'vs8890864@gmail.com')
-        admin_username = os.getenv('ADMIN_USERNAME', 'vinay')
-        admin_password = os.getenv('ADMIN_PASSWORD', 'admin123')
-        
-        # Create admin user
-        admin_user = User(
-            username=admin_username,
-            email=admin_email,
-            is_admin=True,
-            is_active=True
-        )
-        admin_user.set_password(admin_password)
+        admin_user, created = ensure_admin_account()
         
-        db.session.add(admin_user)
-        db.session.commit()
+        if not created:
+            print(f"✅ Admin account already exists: {admin_user.email}")
+            return admin_user
         
         print(f"👑 Admin account created successfully!")
-        print(f"📧 Email: {admin_email}")
-        print(f"👤 Username: {admin_username}")
-        print(f"🔐 Password: {admin_password}")
+        print(f"📧 Email: {admin_user.email}")
+        print(f"👤 Username: {admin_user.username}")
+        print(f"🔐 Password: {os.getenv('ADMIN_PASSWORD', 'admin123')}")
         print(f"🌐 Admin URL: https://your-app.onrender.com/admin/dashboard")
         
         return admin_user
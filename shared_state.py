@@ -0,0 +1,143 @@
+# shared_state.py
+"""Cross-worker invalidation for in-process caches.
+
+Every gunicorn worker keeps its own caches. A ``VersionStamp`` is a tiny
+file in the shared state directory: bumping it replaces the file, and each
+worker notices on its next check with a single ``stat`` call instead of a
+database round trip.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+_state_dir = None
+
+# Set in the gunicorn master and while warming caches: no ProcessThread starts
+_threads_held = False
+
+
+def init_shared_state(app):
+    global _state_dir
+    app.config.setdefault('SHARED_STATE_DIR', os.getenv('SHARED_STATE_DIR') or os.path.join(app.instance_path, 'shared'))
+    _state_dir = app.config['SHARED_STATE_DIR']
+    os.makedirs(_state_dir, exist_ok=True)
+
+
+def state_path(*parts):
+    """Path inside the shared state directory."""
+    base = _state_dir or os.path.join(tempfile.gettempdir(), 'aura-shared')
+    return os.path.join(base, *parts)
+
+
+class VersionStamp:
+    """A named version that any worker can bump and every worker can check cheaply."""
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def path(self):
+        return state_path(f'{self.name}.version')
+
+    def current(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def bump(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.{uuid.uuid4().hex}'
+        with open(tmp, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp, self.path)
+
+
+class CachedValue:
+    """A value reloaded after ``ttl`` seconds or as soon as its stamp is bumped."""
+
+    def __init__(self, loader, ttl, stamp=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.stamp = stamp
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self.stamp.current() if self.stamp else None
+        entry = self._entry
+        if entry is not None and entry[1] > time.monotonic() and entry[2] == version:
+            return entry[0]
+        with self._lock:
+            value = self.loader()
+            self._entry = (value, time.monotonic() + self.ttl, version)
+            return value
+
+    def invalidate(self):
+        """Drop the value here and, through the stamp, in every other worker."""
+        self._entry = None
+        if self.stamp:
+            self.stamp.bump()
+
+
+def hold_process_threads(held=True):
+    """Keep ``ProcessThread.start`` from starting threads in this process.
+
+    The gunicorn master holds them so it only ever forks: a thread running
+    there would send mail and hold connections outside the worker pools,
+    and a fork while it holds a lock can deadlock the worker.
+    """
+    global _threads_held
+    _threads_held = held
+
+
+@contextmanager
+def process_threads_held():
+    """Hold process threads for the duration of the block, e.g. a cache warm-up."""
+    previous = _threads_held
+    hold_process_threads()
+    try:
+        yield
+    finally:
+        hold_process_threads(previous)
+
+
+class ProcessThread:
+    """A daemon thread that runs at most once per process.
+
+    ``start`` is cheap enough to call on every request. It is checked
+    against the pid, so an object created before a gunicorn fork starts its
+    own thread in every worker. ``target`` loops ``while thread.running()``;
+    ``stop`` makes it return. Nothing starts while threads are held.
+    """
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if _threads_held or self.alive():
+            return
+        with self._lock:
+            if self.alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
+
+    def alive(self):
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def running(self):
+        """True while the thread started in this process should keep going."""
+        return self._pid == os.getpid()
+
+    def stop(self):
+        self._pid = None
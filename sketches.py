@@ -0,0 +1,180 @@
+# sketches.py
+"""Probabilistic counters for realtime analytics.
+
+``HyperLogLog`` estimates the number of distinct values it has seen in a
+fixed number of bytes, and two sketches merge by taking the register-wise
+maximum. ``SlidingWindowSketches`` keeps one pair of sketches (sessions and
+IP addresses) per time bucket, so the unique visitors over the last 5
+minutes, 30 minutes or 24 hours cost a fixed amount of memory no matter how
+much traffic arrives. Each worker persists its buckets to a file in the
+shared state directory, and readers merge every worker's file.
+"""
+import glob
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+
+from shared_state import state_path
+
+
+class HyperLogLog:
+    """HyperLogLog sketch with ``2 ** precision`` one-byte registers."""
+
+    def __init__(self, precision=10, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def copy(self):
+        return HyperLogLog(self.precision, self.registers)
+
+
+class SlidingWindowSketches:
+    """Unique sessions and IPs over sliding windows, mergeable across workers.
+
+    Minute buckets cover windows up to ``MINUTE_BUCKETS`` minutes and hour
+    buckets cover windows up to ``HOUR_BUCKETS`` hours.
+    """
+
+    MINUTE_BUCKETS = 30
+    HOUR_BUCKETS = 24
+    _HEADER = struct.Struct('<4sB')
+    _RECORD = struct.Struct('<Bq')
+    _MAGIC = b'HLW1'
+
+    def __init__(self, name, precision=10, persist_interval=5.0):
+        self.name = name
+        self.precision = precision
+        self.persist_interval = persist_interval
+        # {(resolution seconds, bucket start): (sessions sketch, ips sketch)}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_persist = 0.0
+
+    def add(self, session_id, ip_address, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for resolution in (60, 3600):
+                key = (resolution, int(now // resolution) * resolution)
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = (HyperLogLog(self.precision), HyperLogLog(self.precision))
+                if session_id:
+                    bucket[0].add(session_id)
+                if ip_address:
+                    bucket[1].add(ip_address)
+            self._expire(now)
+        if time.monotonic() - self._last_persist > self.persist_interval:
+            self.persist()
+
+    def window(self, seconds, now=None, shared=True):
+        """Return ``(unique_sessions, unique_ips)`` over the last ``seconds``.
+
+        With ``shared`` the buckets persisted by every worker are merged in.
+        """
+        now = time.time() if now is None else now
+        resolution = 60 if seconds <= self.MINUTE_BUCKETS * 60 else 3600
+        oldest = int((now - seconds) // resolution) * resolution
+        # A minute window starts at the next bucket boundary; an hour window
+        # keeps its partial oldest bucket so "24h" never undercounts
+        if resolution == 60:
+            oldest += resolution
+
+        sessions, ips = HyperLogLog(self.precision), HyperLogLog(self.precision)
+        sources = self._load_shared() if shared else [self._snapshot()]
+        for buckets in sources:
+            for (bucket_resolution, start), (bucket_sessions, bucket_ips) in buckets.items():
+                if bucket_resolution == resolution and start >= oldest:
+                    sessions.merge(bucket_sessions)
+                    ips.merge(bucket_ips)
+        return sessions.count(), ips.count()
+
+    def persist(self):
+        """Write this worker's buckets to the shared state directory."""
+        self._last_persist = time.monotonic()
+        data = self._serialize(self._snapshot())
+        path = self._path(os.getpid())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _snapshot(self):
+        with self._lock:
+            return {key: (s.copy(), i.copy()) for key, (s, i) in self._buckets.items()}
+
+    def _expire(self, now):
+        horizon = {60: now - (self.MINUTE_BUCKETS + 1) * 60, 3600: now - (self.HOUR_BUCKETS + 1) * 3600}
+        for key in [key for key in self._buckets if key[1] < horizon[key[0]]]:
+            del self._buckets[key]
+
+    def _path(self, pid):
+        return state_path('sketches', f'{self.name}.{pid}.hlw')
+
+    def _load_shared(self):
+        # This worker's live buckets plus whatever the other workers persisted
+        sources = [self._snapshot()]
+        own = self._path(os.getpid())
+        stale_before = time.time() - (self.HOUR_BUCKETS + 1) * 3600
+        for path in glob.glob(state_path('sketches', f'{self.name}.*.hlw')):
+            if path == own:
+                continue
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    os.remove(path)
+                    continue
+                with open(path, 'rb') as f:
+                    sources.append(self._deserialize(f.read()))
+            except (OSError, ValueError, struct.error):
+                continue
+        return sources
+
+    def _serialize(self, buckets):
+        parts = [self._HEADER.pack(self._MAGIC, self.precision)]
+        for (resolution, start), (sessions, ips) in buckets.items():
+            parts.append(self._RECORD.pack(0 if resolution == 60 else 1, start))
+            parts.append(bytes(sessions.registers))
+            parts.append(bytes(ips.registers))
+        return b''.join(parts)
+
+    def _deserialize(self, data):
+        magic, precision = self._HEADER.unpack_from(data, 0)
+        if magic != self._MAGIC or precision != self.precision:
+            raise ValueError('incompatible sketch file')
+        size = 1 << precision
+        offset = self._HEADER.size
+        buckets = {}
+        while offset < len(data):
+            kind, start = self._RECORD.unpack_from(data, offset)
+            offset += self._RECORD.size
+            sessions = HyperLogLog(precision, data[offset:offset + size])
+            ips = HyperLogLog(precision, data[offset + size:offset + 2 * size])
+            offset += 2 * size
+            buckets[(60 if kind == 0 else 3600, start)] = (sessions, ips)
+        return buckets
@@ -0,0 +1,112 @@
+# sqlite_tuning.py
+"""Production profile for SQLite: WAL, tuned pragmas and periodic checkpoints.
+
+With the default rollback journal a writer locks out every reader for the
+length of its commit, and concurrent gunicorn workers (plus the ingest and
+outbox threads) pile up behind each other until ``database is locked``.
+When the database is SQLite, every new DBAPI connection is configured on
+the ``connect`` event:
+
+- ``journal_mode=WAL``: readers no longer block the writer or each other;
+- ``synchronous=NORMAL``: fsync on checkpoint instead of every commit,
+  which is durable against application crashes (WAL mode only);
+- ``busy_timeout``: wait for the write lock instead of failing at once;
+- ``mmap_size`` and ``cache_size``: fewer read syscalls for hot pages.
+
+Committing connections still checkpoint automatically when the WAL passes
+1000 pages. A background thread per worker additionally runs a ``PASSIVE``
+checkpoint every ``SQLITE_CHECKPOINT_INTERVAL`` seconds, so that work is
+mostly done outside requests and the WAL, capped on disk by
+``journal_size_limit``, stays small.
+"""
+import os
+import time
+
+from sqlalchemy import event
+
+from extensions import db
+from shared_state import ProcessThread
+
+
+def sqlite_pragmas(config):
+    """The ``PRAGMA`` statements for ``config``, in the order they must run."""
+    pragmas = [('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT_MS']))]
+    if config['SQLITE_WAL']:
+        pragmas += [
+            ('journal_mode', 'WAL'),
+            ('synchronous', config['SQLITE_SYNCHRONOUS']),
+            ('journal_size_limit', int(config['SQLITE_JOURNAL_SIZE_LIMIT'])),
+        ]
+    pragmas += [
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        # Negative values are KiB rather than pages
+        ('cache_size', -int(config['SQLITE_CACHE_SIZE_KB'])),
+    ]
+    return pragmas
+
+
+def install_pragmas(engine, pragmas):
+    """Run ``pragmas`` on every connection ``engine`` opens from now on."""
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def checkpoint(engine, mode='PASSIVE'):
+    """Checkpoint the WAL; returns ``(busy, wal_pages, checkpointed_pages)``."""
+    with engine.connect() as connection:
+        return tuple(connection.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').one())
+
+
+class SQLiteProfile:
+
+    def __init__(self):
+        self.app = None
+        self.engine = None
+        self._worker = ProcessThread(self._run, 'SQLiteCheckpointer')
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_WAL', os.getenv('SQLITE_WAL', 'true').lower() == 'true')
+        app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT_MS', int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)))
+        app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+        app.config.setdefault('SQLITE_CACHE_SIZE_KB', 20000)
+        app.config.setdefault('SQLITE_JOURNAL_SIZE_LIMIT', 64 * 1024 * 1024)
+        app.config.setdefault('SQLITE_CHECKPOINT_INTERVAL', int(os.getenv('SQLITE_CHECKPOINT_INTERVAL', 60)))
+
+        self.app = app
+        with app.app_context():
+            engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return
+        self.engine = engine
+        install_pragmas(engine, sqlite_pragmas(app.config))
+
+        if app.config['SQLITE_WAL'] and app.config['SQLITE_CHECKPOINT_INTERVAL'] > 0:
+            @app.before_request
+            def start_sqlite_checkpointer():
+                self.ensure_running()
+
+    def ensure_running(self):
+        self._worker.start()
+
+    def _run(self):
+        while self._worker.running():
+            time.sleep(self.app.config['SQLITE_CHECKPOINT_INTERVAL'])
+            try:
+                checkpoint(self.engine)
+            except Exception:
+                self.app.logger.exception('SQLite checkpoint failed')
+
+
+sqlite_profile = SQLiteProfile()
+
+
+def init_sqlite(app):
+    sqlite_profile.init_app(app)
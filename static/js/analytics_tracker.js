@@ -1,9 +1,18 @@
 // Analytics Tracker for Real-time Dashboard
+// Page views and events are queued on the client and sent together to
+// /api/track/batch, using navigator.sendBeacon so the final flush survives
+// the page being hidden or unloaded.
 class AnalyticsTracker {
     constructor() {
+        this.endpoint = '/api/track/batch';
+        this.flushInterval = 10000;
+        this.maxQueueSize = 20;
+        this.pageviews = [];
+        this.events = [];
         this.sessionId = this.getSessionId();
         this.trackPageView();
         this.trackEvents();
+        this.scheduleFlush();
     }
 
     getSessionId() {
@@ -16,15 +25,11 @@ class AnalyticsTracker {
     }
 
     trackPageView() {
-        const data = {
+        this.pageviews.push({
             page_url: window.location.pathname,
             page_title: document.title,
-            referrer: document.referrer,
-            user_agent: navigator.userAgent,
-            session_id: this.sessionId
-        };
-
-        this.sendData('/api/track/pageview', data);
+            referrer: document.referrer
+        });
     }
 
     trackEvents() {
@@ -47,32 +52,68 @@ class AnalyticsTracker {
             });
         });
 
-        // Track page exit
-        window.addEventListener('beforeunload', () => {
+        // Track page exit and deliver whatever is still queued
+        window.addEventListener('pagehide', () => {
             this.trackEvent('page_exit', {
-                time_on_page: Date.now() - performance.now()
+                time_on_page: Math.round(performance.now())
             });
+            this.flush();
+        });
+
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                this.flush();
+            }
         });
     }
 
     trackEvent(eventType, data) {
-        const eventData = {
+        this.events.push({
             event_type: eventType,
             data: data,
-            page_url: window.location.pathname,
-            session_id: this.sessionId
-        };
+            page_url: window.location.pathname
+        });
+
+        if (this.pageviews.length + this.events.length >= this.maxQueueSize) {
+            this.flush();
+        }
+    }
+
+    scheduleFlush() {
+        setInterval(() => this.flush(), this.flushInterval);
+    }
+
+    flush() {
+        if (this.pageviews.length === 0 && this.events.length === 0) {
+            return;
+        }
 
-        this.sendData('/api/track/event', eventData);
+        const body = JSON.stringify({
+            session_id: this.sessionId,
+            user_agent: navigator.userAgent,
+            pageviews: this.pageviews,
+            events: this.events
+        });
+        this.pageviews = [];
+        this.events = [];
+
+        if (navigator.sendBeacon) {
+            const blob = new Blob([body], { type: 'application/json' });
+            if (navigator.sendBeacon(this.endpoint, blob)) {
+                return;
+            }
+        }
+        this.sendData(this.endpoint, body);
     }
 
-    sendData(endpoint, data) {
+    sendData(endpoint, body) {
         fetch(endpoint, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(data)
+            body: body,
+            keepalive: true
         }).catch(error => {
             console.log('Analytics tracking failed:', error);
         });
@@ -49,8 +49,15 @@ class NotificationSystem {
 
         const content = document.createElement('div');
         content.style.cssText = 'flex: 1;';
-        content.innerHTML = `<div style="font-weight: 600; margin-bottom: 4px;">${this.getTitle(type)}</div>
-                             <div style="font-size: 14px; color: #666;">${message}</div>`;
+        const title = document.createElement('div');
+        title.style.cssText = 'font-weight: 600; margin-bottom: 4px;';
+        title.textContent = this.getTitle(type);
+        const text = document.createElement('div');
+        text.style.cssText = 'font-size: 14px; color: #666;';
+        // Messages may quote visitor input, so never parse them as HTML
+        text.textContent = message;
+        content.appendChild(title);
+        content.appendChild(text);
 
         const closeBtn = document.createElement('button');
         closeBtn.innerHTML = '×';
@@ -129,24 +136,35 @@ class NotificationSystem {
     }
 
     startPolling() {
-        // Poll for new notifications every 30 seconds
-        setInterval(() => {
-            this.checkNewNotifications();
-        }, 30000);
+        // Long-poll: each request waits on the server until something new
+        // arrives, then the next one starts. Visitors are told to stop.
+        this.etag = null;
+        this.checkNewNotifications();
     }
 
     async checkNewNotifications() {
+        let delay = 0;
         try {
-            const response = await fetch('/api/notifications');
-            if (response.ok) {
+            const headers = this.etag ? { 'If-None-Match': this.etag } : {};
+            const wait = this.etag ? 25 : 0;
+            const response = await fetch(`/api/notifications?wait=${wait}`, { headers, cache: 'no-store' });
+            if (response.headers.get('X-Notifications') === 'off') {
+                return;
+            }
+            this.etag = response.headers.get('ETag') || this.etag;
+            if (response.status === 200) {
                 const notifications = await response.json();
                 notifications.forEach(notification => {
                     this.show(notification.message, notification.type);
                 });
+            } else if (response.status !== 304) {
+                delay = 30000;
             }
         } catch (error) {
             console.log('Error checking notifications:', error);
+            delay = 30000;
         }
+        setTimeout(() => this.checkNewNotifications(), delay);
     }
 }
 
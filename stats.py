@@ -0,0 +1,89 @@
+# stats.py
+"""Cached statistics for the admin dashboard and list views.
+
+Each table is summarised with one grouped query and cached for a short
+TTL. Writes that change the numbers call ``invalidate_contact_stats`` or
+``invalidate_chatbot_stats``, which also reaches the other workers.
+"""
+import rollups
+from extensions import db
+from models import ChatbotConversation, ContactMessage
+from shared_state import CachedValue, VersionStamp
+
+STATS_CACHE_TTL = 30
+
+CONTACT_STATUSES = ('new', 'pending', 'responded', 'closed')
+CHATBOT_STATUSES = ('active', 'completed', 'follow_up')
+
+
+def contact_stats_statement():
+    return db.select(
+        ContactMessage.status,
+        db.func.count(ContactMessage.id),
+        db.func.sum(db.case((ContactMessage.is_read.is_(False), 1), else_=0)),
+    ).group_by(ContactMessage.status)
+
+
+def chatbot_stats_statement():
+    return db.select(
+        ChatbotConversation.status,
+        db.func.count(ChatbotConversation.id),
+    ).group_by(ChatbotConversation.status)
+
+
+def _load_contact_stats():
+    rows = db.session.execute(contact_stats_statement()).all()
+
+    stats = {'total': 0, 'unread': 0}
+    stats.update({status: 0 for status in CONTACT_STATUSES})
+    for status, count, unread in rows:
+        stats['total'] += count
+        stats['unread'] += unread or 0
+        if status in stats:
+            stats[status] = count
+    return stats
+
+
+def _load_chatbot_stats():
+    rows = db.session.execute(chatbot_stats_statement()).all()
+
+    stats = {'total': 0}
+    stats.update({status: 0 for status in CHATBOT_STATUSES})
+    for status, count in rows:
+        stats['total'] += count
+        if status in stats:
+            stats[status] = count
+    return stats
+
+
+def _load_traffic_stats():
+    total_page_views, total_sessions = rollups.totals()
+    return {'page_views': total_page_views, 'sessions': total_sessions}
+
+
+_contact_stats = CachedValue(_load_contact_stats, STATS_CACHE_TTL, VersionStamp('contact-stats'))
+_chatbot_stats = CachedValue(_load_chatbot_stats, STATS_CACHE_TTL, VersionStamp('chatbot-stats'))
+_traffic_stats = CachedValue(_load_traffic_stats, STATS_CACHE_TTL)
+
+
+def contact_stats():
+    """Contact message totals: ``total``, ``unread`` and one count per status."""
+    return _contact_stats.get()
+
+
+def chatbot_stats():
+    """Chatbot conversation totals: ``total`` and one count per status."""
+    return _chatbot_stats.get()
+
+
+def traffic_stats():
+    """Rolled-up ``page_views`` and ``sessions`` totals."""
+    return _traffic_stats.get()
+
+
+def invalidate_contact_stats():
+    _contact_stats.invalidate()
+
+
+def invalidate_chatbot_stats():
+    _chatbot_stats.invalidate()
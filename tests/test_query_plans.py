@@ -0,0 +1,15 @@
+# tests/test_query_plans.py
+"""The hot admin and API queries must stay index-driven (see query_plans.py)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_plans import check_query_plans, hot_queries
+
+
+def test_hot_queries_use_indexes():
+    results = check_query_plans()
+    assert len(results) == len(hot_queries())
+    full_scans = {name: (scans, plan) for name, plan, scans in results if scans}
+    assert full_scans == {}
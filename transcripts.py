@@ -0,0 +1,50 @@
+# transcripts.py
+"""Compact storage for chatbot lead transcripts.
+
+A transcript is stored in ``ChatbotConversation.transcript`` as one JSON
+array: integers reference a line in ``BOT_LINES`` and strings are the
+user's answers, stored inline. Bot lines may use ``{name}`` and
+``{service}``, filled from the conversation when the transcript is
+expanded for display.
+
+Never edit or renumber an existing line; add a new id instead so stored
+transcripts keep their meaning.
+"""
+import json
+from collections import namedtuple
+
+BOT_LINES = {
+    1: "👋 Hello! I'm Aura Assistant, your friendly AI helper!",
+    2: "Nice to meet you, {name}! 🎉",
+    3: "What's your email address?",
+    4: "Thank you! 📧",
+    5: "What's your contact number?",
+    6: "Thank you! 📞",
+    7: "What service do you need?",
+    8: "Perfect! I've noted that you need {service}. ✅",
+    9: "Thank you for providing your information! Our team will contact you soon. 🚀",
+}
+
+# The lead-capture script: bot line ids and the lead fields answered by the user
+LEAD_SCRIPT = [1, 'name', 2, 'email', 3, 4, 'phone', 5, 6, 7, 'service', 8, 9]
+
+TranscriptMessage = namedtuple('TranscriptMessage', 'sender message_text created_at')
+
+
+def pack_lead_transcript(lead):
+    """Serialise the lead-capture conversation for ``lead`` (a dict of answers)."""
+    # Answers are always strings (a phone sent as a JSON number too); only bot lines are ints
+    tokens = [step if isinstance(step, int) else str(lead.get(step) or '') for step in LEAD_SCRIPT]
+    return json.dumps(tokens, separators=(',', ':'), ensure_ascii=False)
+
+
+def expand_transcript(conversation):
+    """Return the stored transcript of ``conversation`` as a list of ``TranscriptMessage``."""
+    params = {'name': conversation.user_name, 'service': conversation.service_requested}
+    messages = []
+    for token in json.loads(conversation.transcript):
+        if isinstance(token, int):
+            messages.append(TranscriptMessage('bot', BOT_LINES[token].format(**params), conversation.created_at))
+        else:
+            messages.append(TranscriptMessage('user', token, conversation.created_at))
+    return messages